@@ -0,0 +1,75 @@
+"""
+The codec module is the single place gamelib parses and serializes json.
+It uses orjson or ujson when one of them is installed, and the standard library json module otherwise.
+Call codec.loads and codec.dumps rather than importing the functions, so set_backend can swap them.
+"""
+
+import json
+
+BACKENDS = ["orjson", "ujson", "json"]
+
+def _stdlib_loads(text):
+    return json.loads(text)
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj)
+
+def _make_backend(name):
+    """Builds the loads and dumps functions for a backend
+
+    Args:
+        name: One of BACKENDS
+
+    Returns:
+        A (loads, dumps) tuple, or None if the backend is not installed
+
+    """
+    if name == "json":
+        return _stdlib_loads, _stdlib_dumps
+    try:
+        module = __import__(name)
+    except ImportError:
+        return None
+
+    if name == "orjson":
+        def dumps(obj):
+            try:
+                return module.dumps(obj).decode("utf-8")
+            except TypeError:
+                #orjson is stricter about types (numpy scalars for example) than the standard library
+                return json.dumps(obj)
+        return module.loads, dumps
+    return module.loads, module.dumps
+
+def available_backends():
+    """Lists the installed backends, fastest first
+
+    Returns:
+        A list of backend names
+
+    """
+    return [name for name in BACKENDS if _make_backend(name) is not None]
+
+def set_backend(name=None):
+    """Chooses the backend used by loads and dumps
+
+    Args:
+        name: One of BACKENDS, or None for the fastest one installed
+
+    Returns:
+        The name of the backend now in use
+
+    """
+    global backend, loads, dumps
+    for candidate in ([name] if name else BACKENDS):
+        functions = _make_backend(candidate)
+        if functions is not None:
+            backend = candidate
+            loads, dumps = functions
+            return backend
+    raise ValueError("json backend {} is not installed".format(name))
+
+backend = None
+loads = _stdlib_loads
+dumps = _stdlib_dumps
+set_backend()
@@ -1,10 +1,13 @@
 import math
-import json
+import contextlib
+import copy
+import sys
 
+from . import codec
 from .navigation import ShortestPathFinder
 from .util import send_command, debug_write
 from .unit import GameUnit
-from .game_map import GameMap
+from .game_map import GameMap, range_stencil, edge_bitmask_table, target_scan_table
 
 def is_stationary(unit_type):
     """
@@ -35,7 +38,8 @@ class GameState:
         * BITS (int): A constant representing the bits resource, used in the get_resource function
         * CORES (int): A constant representing the cores resource, used in the get_resource function
          
-        * game_map (:obj: GameMap): The current GameMap. To retrieve a list of GameUnits at a location, use game_map[x, y]
+        * game_map (:obj: GameMap): The current GameMap. To retrieve a list of GameUnits at a location, use game_map[x, y]. In lazy mode the units are placed on the first access
+        * lazy (bool): Whether units are placed on the map only when game_map is first accessed
         * turn_number (int): The current turn number. Starts at 0.
         * my_health (int): Your current remaining health
         * my_time (int): The time you took to submit your previous turn
@@ -44,15 +48,20 @@ class GameState:
 
     """
 
-    def __init__(self, config, serialized_string):
+    def __init__(self, config, serialized_string, lazy=False):
         """ Setup a turns variables using arguments passed
 
         Args:
             * config (JSON): A json object containing information about the game
-            * serialized_string (string): A string containing information about the game state at the start of this turn
+            * serialized_string (string): A string containing information about the game state at the start of this turn,
+              or the same state already parsed into a dict so it is not parsed again
+            * lazy (bool): If True, units are only placed on the map the first time game_map is accessed, so a turn
+              that only looks at resources and health never builds them
 
         """
         self.serialized_string = serialized_string
+        self.lazy = lazy
+        self._raw_units = None
         self.config = config
         self.enable_warnings = True
 
@@ -81,10 +90,12 @@ class GameState:
         self.BITS = 0
         self.CORES = 1
 
-        self.game_map = GameMap(self.config)
+        self._game_map = GameMap(self.config)
         self._shortest_path_finder = ShortestPathFinder()
         self._build_stack = []
         self._deploy_stack = []
+        self._threat_maps = {}
+        self._path_oracles = {}
         self._player_resources = [
                 {'cores': 0, 'bits': 0},  # player 0, which is you
                 {'cores': 0, 'bits': 0}]  # player 1, which is the opponent
@@ -93,9 +104,9 @@ class GameState:
     def __parse_state(self, state_line):
         """
         Fills in map based on the serialized game state so that self.game_map[x,y] is a list of GameUnits at that location.
-        state_line is the game state as a json string.
+        state_line is the game state as a json string, or as the dict it parses to.
         """
-        state = json.loads(state_line)
+        state = state_line if isinstance(state_line, dict) else codec.loads(state_line)
 
         turn_info = state["turnInfo"]
         self.turn_number = int(turn_info[1])
@@ -112,9 +123,28 @@ class GameState:
             {'cores': p1_cores, 'bits': p1_bits},
             {'cores': p2_cores, 'bits': p2_bits}]
 
-        p1units = state["p1Units"]
-        p2units = state["p2Units"]
+        #The raw unit lists are kept until the map is needed
+        self._raw_units = (state["p1Units"], state["p2Units"])
+        if not self.lazy:
+            self.__materialize_units()
 
+    @property
+    def game_map(self):
+        if self._raw_units is not None:
+            self.__materialize_units()
+        return self._game_map
+
+    @game_map.setter
+    def game_map(self, game_map):
+        self._raw_units = None
+        self._game_map = game_map
+
+    def __materialize_units(self):
+        """
+        Places the units held back by __parse_state on the map.
+        """
+        p1units, p2units = self._raw_units
+        self._raw_units = None
         self.__create_parsed_units(p1units, 0)
         self.__create_parsed_units(p2units, 1)
 
@@ -136,7 +166,7 @@ class GameState:
                         self.game_map[x,y][0].pending_removal = True
                 else:
                     unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
-                    self.game_map[x,y].append(unit)
+                    self.game_map._place_unit(unit)
 
     def __resource_required(self, unit_type):
         return self.CORES if is_stationary(unit_type) else self.BITS
@@ -163,8 +193,8 @@ class GameState:
         """Submit and end your turn.
             Must be called at the end of your turn or the algo will hang.
         """
-        build_string = json.dumps(self._build_stack)
-        deploy_string = json.dumps(self._deploy_stack)
+        build_string = codec.dumps(self._build_stack)
+        deploy_string = codec.dumps(self._deploy_stack)
         send_command(build_string)
         send_command(deploy_string)
 
@@ -234,13 +264,81 @@ class GameState:
 
         bits = self.get_resource(self.BITS, player_index) if not current_bits else current_bits
         for increment in range(1, turns_in_future + 1):
-            current_turn = self.turn_number + increment
-            bits *= (1 - self.config["resources"]["bitDecayPerRound"])
-            bits_gained = self.config["resources"]["bitsPerRound"] + (self.config["resources"]["bitGrowthRate"] * (current_turn // self.config["resources"]["turnIntervalForBitSchedule"]))
-            bits += bits_gained
-            bits = round(bits, 1)
+            bits = self.__bits_next_turn(bits, self.turn_number + increment)
         return bits
 
+    def __bits_next_turn(self, bits, next_turn):
+        """
+        The bits held at the start of next_turn, from the bits left at the end of the turn before, rounded like the engine does.
+        """
+        resources = self.config["resources"]
+        bits *= (1 - resources["bitDecayPerRound"])
+        bits_gained = resources["bitsPerRound"] + (resources["bitGrowthRate"] * (next_turn // resources["turnIntervalForBitSchedule"]))
+        bits += bits_gained
+        return round(bits, 1)
+
+    def project_bits_curve(self, turns_in_future, spend_schedules=(None, None), current_bits=(None, None)):
+        """Predicts the bits of both players on every turn up to a future turn, with planned spending
+
+        Each turn's rounding depends on the turn before, so the curve is built in one pass per player instead of
+        calling project_future_bits once per turn. Without spending it matches project_future_bits exactly.
+
+        Args:
+            * turns_in_future: The number of turns to look ahead
+            * spend_schedules: For each player, a list of the bits spent on this turn, the next one and so on, or None
+              for no spending. Turns past the end of a list spend nothing
+            * current_bits: For each player, the bits to start from instead of their current bits, or None
+
+        Returns:
+            A tuple of two lists, yours and your opponent's, with turns_in_future + 1 entries. Entry i is the number of
+            bits the player holds at the start of the turn i turns from now, before spending on it
+
+        """
+        curves = []
+        for player_index in (0, 1):
+            bits = current_bits[player_index]
+            if bits is None:
+                bits = self.get_resource(self.BITS, player_index)
+            spending = spend_schedules[player_index] or ()
+            curve = [bits]
+            for increment in range(1, turns_in_future + 1):
+                if increment <= len(spending) and spending[increment - 1]:
+                    if spending[increment - 1] > bits:
+                        self.warn("Planned to spend {} bits with only {} available.".format(spending[increment - 1], bits))
+                    bits = max(0, bits - spending[increment - 1])
+                bits = self.__bits_next_turn(bits, self.turn_number + increment)
+                curve.append(bits)
+            curves.append(curve)
+        return tuple(curves)
+
+    def turns_until_bits(self, target_bits, player_index=0, spend_schedule=None, max_turns=99):
+        """Finds the earliest turn a player will hold a number of bits, for example to afford a wave of information units
+
+        Args:
+            * target_bits: The number of bits wanted
+            * player_index: The player whose bits we are tracking
+            * spend_schedule: A list of the bits spent on this turn, the next one and so on, or None for no spending
+            * max_turns: The number of turns to look ahead before giving up
+
+        Returns:
+            The number of turns from now, 0 if the player already has the bits, or None if they do not get them within max_turns
+
+        """
+        if not player_index == 1 and not player_index == 0:
+            self._invalid_player_index(player_index)
+            return
+        bits = self.get_resource(self.BITS, player_index)
+        if bits >= target_bits:
+            return 0
+        spending = spend_schedule or ()
+        for increment in range(1, max_turns + 1):
+            if increment <= len(spending) and spending[increment - 1]:
+                bits = max(0, bits - spending[increment - 1])
+            bits = self.__bits_next_turn(bits, self.turn_number + increment)
+            if bits >= target_bits:
+                return increment
+        return None
+
     def type_cost(self, unit_type):
         """Gets the cost of a unit based on its type
 
@@ -287,7 +385,9 @@ class GameState:
         stationary = is_stationary(unit_type)
         blocked = self.contains_stationary_unit(location) or (stationary and len(self.game_map[location[0],location[1]]) > 0)
         correct_territory = location[1] < self.HALF_ARENA
-        on_edge = location in (self.game_map.get_edge_locations(self.game_map.BOTTOM_LEFT) + self.game_map.get_edge_locations(self.game_map.BOTTOM_RIGHT))
+        x, y = map(int, location)
+        edge_masks = edge_bitmask_table(self.ARENA_SIZE)
+        on_edge = bool((edge_masks[self.game_map.BOTTOM_LEFT] | edge_masks[self.game_map.BOTTOM_RIGHT]) >> (x * self.ARENA_SIZE + y) & 1)
 
         if self.enable_warnings:
             fail_reason = ""
@@ -317,6 +417,9 @@ class GameState:
         Returns:
             The number of units successfully spawned
 
+        Each location is checked once. Information units stack, so as many of the num units as can be afforded
+        are spawned there in one step, a large wave costs about as much as a single unit.
+
         """
         if unit_type not in ALL_UNITS:
             self._invalid_unit(unit_type)
@@ -327,20 +430,26 @@ class GameState:
       
         if type(locations[0]) == int:
             locations = [locations]
+        cost = self.type_cost(unit_type)
+        resource_type = self.__resource_required(unit_type)
+        stationary = is_stationary(unit_type)
         spawned_units = 0
         for location in locations:
-            for i in range(num):
-                if self.can_spawn(unit_type, location, 1):
-                    x, y = map(int, location)
-                    cost = self.type_cost(unit_type)
-                    resource_type = self.__resource_required(unit_type)
-                    self.__set_resource(resource_type, 0 - cost)
-                    self.game_map.add_unit(unit_type, location, 0)
-                    if is_stationary(unit_type):
-                        self._build_stack.append((unit_type, x, y))
-                    else:
-                        self._deploy_stack.append((unit_type, x, y))
-                    spawned_units += 1
+            if not self.can_spawn(unit_type, location, 1):
+                continue
+            x, y = map(int, location)
+            count = 1 if stationary else min(num, self.number_affordable(unit_type))
+            self.__set_resource(resource_type, 0 - cost * count)
+            if stationary:
+                self.game_map.add_unit(unit_type, location, 0)
+                self._build_stack.append((unit_type, x, y))
+            else:
+                self.game_map._add_units(unit_type, x, y, 0, count)
+                self._deploy_stack.extend([(unit_type, x, y)] * count)
+            spawned_units += count
+            if count < num:
+                #Reports why the rest could not be spawned, as the first failed unit would have
+                self.can_spawn(unit_type, location, 1)
         return spawned_units
 
     def attempt_remove(self, locations):
@@ -410,6 +519,193 @@ class GameState:
         end_points = self.game_map.get_edge_locations(target_edge)
         return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
 
+    def get_path_oracle(self, target_edge):
+        """Gets a PathOracle for the current firewall layout and a target edge
+
+        Building the oracle costs about as much as one find_path_to_edge call. Its get_path function then
+        returns the path from any start location to target_edge in time proportional to the path length,
+        so evaluating many spawn locations only pays for the search once per edge.
+        Unless incremental pathing is on (see set_incremental_pathing), the oracle does not follow later
+        changes to the map, get a new one after placing or removing firewalls. Oracles are cached per edge
+        until the firewall layout changes.
+
+        Args:
+            target_edge: The edge the units want to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc.
+
+        Returns:
+            A PathOracle whose get_path(start_location) matches find_path_to_edge(start_location, target_edge)
+
+        """
+        end_points = self.game_map.get_edge_locations(target_edge)
+        if end_points is None:
+            return
+        if self._shortest_path_finder.incremental:
+            return self._shortest_path_finder.get_oracle(end_points, self)
+        blocked = self.game_map.get_blocked_bitboard()
+        cached = self._path_oracles.get(target_edge)
+        if cached is not None and cached[0] == blocked:
+            return cached[1]
+        oracle = self._shortest_path_finder.get_oracle(end_points, self)
+        self._path_oracles[target_edge] = (blocked, oracle)
+        return oracle
+
+    def layout_fingerprint(self):
+        """Identifies the firewall layout, two states with the same fingerprint path and get attacked the same way
+
+        Returns:
+            A tuple of the bitboards of every firewall type for both players
+
+        """
+        return tuple(self.game_map.get_bitboard(unit_type, player_index) for player_index in (0, 1) for unit_type in FIREWALL_TYPES)
+
+    def adopt_cached_analysis(self, other_state):
+        """Reuses the threat maps and path oracles another state has already computed
+
+        Entries are looked up by the layout they were built for, so the ones that do not match this state's
+        firewalls are simply never used.
+
+        Args:
+            other_state: A GameState for the same game, for example one built from the last action frame
+
+        """
+        for player_index, cached in list(other_state._threat_maps.items()):
+            self._threat_maps.setdefault(player_index, cached)
+        for target_edge, cached in list(other_state._path_oracles.items()):
+            self._path_oracles.setdefault(target_edge, cached)
+
+    def snapshot(self, stationary_only=False):
+        """Packs the units, resources, health and queued spawns into flat tuples, to go back to them later with restore
+
+        Use it to try out moves on this state, then undo them all at once.
+
+        Args:
+            stationary_only: If True, information units on the map are left out
+
+        Returns:
+            A tuple that can be passed to restore, on this state or a clone of it
+
+        """
+        resources = self._player_resources
+        return (self.game_map.snapshot(stationary_only),
+            (resources[0]['cores'], resources[0]['bits'], resources[1]['cores'], resources[1]['bits']),
+            self.turn_number, self.my_health, self.enemy_health,
+            tuple(map(tuple, self._build_stack)), tuple(map(tuple, self._deploy_stack)))
+
+    def restore(self, snapshot):
+        """Puts the state back to how it was when snapshot was called
+
+        Args:
+            snapshot: A tuple returned by snapshot
+
+        """
+        map_snapshot, resources, self.turn_number, self.my_health, self.enemy_health, build_stack, deploy_stack = snapshot
+        self._raw_units = None
+        self._game_map.restore(map_snapshot)
+        self._player_resources = [
+            {'cores': resources[0], 'bits': resources[1]},
+            {'cores': resources[2], 'bits': resources[3]}]
+        self._build_stack = list(build_stack)
+        self._deploy_stack = list(deploy_stack)
+
+    def mark(self):
+        """Remembers the current resources, health and queued spawns, and starts recording changes to the map
+
+        Unlike snapshot, no units are copied: the map only records what add_unit and remove_unit replace from
+        now on, so trying a placement with attempt_spawn or attempt_remove and undoing it with rollback
+        costs about as much as the placement itself.
+
+        Close every mark with exactly one rollback or release, so the map stops recording once none are open.
+
+        Returns:
+            A tuple to pass to rollback or release
+
+        """
+        resources = self._player_resources
+        return (self.game_map.mark(), len(self._build_stack), len(self._deploy_stack),
+            resources[0]['cores'], resources[0]['bits'], resources[1]['cores'], resources[1]['bits'],
+            self.turn_number, self.my_health, self.enemy_health)
+
+    def rollback(self, mark):
+        """Undoes every spawn, removal and map change made since mark was called
+
+        Args:
+            mark: A tuple returned by mark. Marks taken after it can no longer be rolled back to
+
+        """
+        (map_mark, build_count, deploy_count, my_cores, my_bits, enemy_cores, enemy_bits,
+            self.turn_number, self.my_health, self.enemy_health) = mark
+        self._game_map.rollback(map_mark)
+        del self._build_stack[build_count:]
+        del self._deploy_stack[deploy_count:]
+        self._player_resources[0]['cores'] = my_cores
+        self._player_resources[0]['bits'] = my_bits
+        self._player_resources[1]['cores'] = enemy_cores
+        self._player_resources[1]['bits'] = enemy_bits
+
+    def release(self, mark):
+        """Keeps every change made since mark was called and closes the mark
+
+        Args:
+            mark: A tuple returned by mark
+
+        """
+        self._game_map.release(mark[0])
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Context manager that rolls back every change made inside the with block when it exits
+
+        Transactions can be nested. To keep a placement, make it outside of the block.
+
+        Example:
+            with game_state.transaction():
+                game_state.attempt_spawn(DESTRUCTOR, [13, 11])
+                damage = game_state.threat_map(1)[1]
+
+        """
+        mark = self.mark()
+        try:
+            yield mark
+        finally:
+            self.rollback(mark)
+
+    def clone(self, stationary_only=False):
+        """Makes an independent copy of the state without parsing the serialized string again
+
+        Spawning, removing or changing units on the clone does not affect this state. The config is shared,
+        and so are the threat maps and path oracles already computed, since they are looked up by layout.
+        Incremental pathing is off on the clone.
+
+        Args:
+            stationary_only: If True, information units on the map are not copied
+
+        Returns:
+            A new GameState
+
+        """
+        clone = copy.copy(self)
+        clone._game_map = GameMap(self.config)
+        clone._game_map.enable_warnings = self.enable_warnings
+        clone._shortest_path_finder = ShortestPathFinder()
+        clone._threat_maps = dict(self._threat_maps)
+        clone._path_oracles = dict(self._path_oracles)
+        clone.restore(self.snapshot(stationary_only))
+        return clone
+
+    def set_incremental_pathing(self, enabled=True):
+        """Keeps pathing results in sync with the map instead of searching from scratch on every query
+
+        While enabled, every game_map.add_unit, game_map.remove_unit or game_map[x, y] = units that places or
+        removes a firewall repairs only the part of the pathing data affected by that tile, so find_path_to_edge
+        and get_path_oracle stay cheap while trying out firewall placements one at a time.
+        Changes made by editing the list returned by game_map[x, y] in place are not tracked.
+
+        Args:
+            enabled: True to turn incremental pathing on, False to turn it off
+
+        """
+        self._shortest_path_finder.set_incremental(self, enabled)
+
     def contains_stationary_unit(self, location):
         """Check if a location is blocked
 
@@ -424,6 +720,8 @@ class GameState:
             self.warn('Checked for stationary unit outside of arena bounds')
             return False
         x, y = map(int, location)
+        if not self.game_map.is_blocked([x, y]):
+            return False
         for unit in self.game_map[x,y]:
             if unit.stationary:
                 return unit
@@ -445,7 +743,7 @@ class GameState:
         """
 
         self.enable_warnings = not suppress
-        self.game_map.enable_warnings = not suppress
+        self._game_map.enable_warnings = not suppress
 
     def get_target(self, attacking_unit):
         """Returns target of given unit based on current map of the game board. 
@@ -466,6 +764,49 @@ class GameState:
             self.warn("Passed a {} to get_target as attacking_unit. Expected a GameUnit.".format(type(attacking_unit)))
             return
 
+        size = self.ARENA_SIZE
+        x, y = attacking_unit.x, attacking_unit.y
+        player_index = attacking_unit.player_index
+        if player_index not in (0, 1) or type(x) is not int or type(y) is not int or not (0 <= x < size and 0 <= y < size):
+            return self.__scan_for_target(attacking_unit)
+
+        #Information units come first, so firewalls are only looked at when none are in range
+        game_map = self.game_map
+        enemy_index = 1 - player_index
+        range_mask, distance_groups = target_scan_table(attacking_unit.range, size)[x * size + y]
+        candidates = game_map.get_bitboard([PING, EMP, SCRAMBLER], enemy_index) & range_mask
+        stationary = False
+        if not candidates:
+            if attacking_unit.unit_type == SCRAMBLER:
+                return None
+            candidates = game_map.get_bitboard(FIREWALL_TYPES, enemy_index) & range_mask
+            stationary = True
+
+        #The nearest group holding a candidate decides, within it the lowest (health, y, -x distance) wins
+        y_sign = 1 if player_index == 0 else -1
+        center = self.HALF_ARENA - 0.5
+        for group_mask, group in distance_groups:
+            if not candidates & group_mask:
+                continue
+            target = None
+            for index in group:
+                if not candidates >> index & 1:
+                    continue
+                for unit in game_map[divmod(index, size)]:
+                    if unit.player_index != enemy_index or unit.stationary != stationary:
+                        continue
+                    key = (unit.health, y_sign * unit.y, -abs(center - unit.x))
+                    if target is None or key < target_key:
+                        target = unit
+                        target_key = key
+            if target is not None:
+                return target
+        return None
+
+    def __scan_for_target(self, attacking_unit):
+        """
+        get_target for units off the grid or without a player, checking every unit in range.
+        """
         attacker_location = [attacking_unit.x, attacking_unit.y]
         possible_locations = self.game_map.get_locations_in_range(attacker_location, attacking_unit.range)
         target = None
@@ -547,6 +888,12 @@ class GameState:
             self.warn("Location {} is not in the arena bounds.".format(location))
 
         attackers = []
+        #Nothing can attack a location the threat map marks as safe, an invalid player index or non-integer location falls back to the full scan
+        x, y = location
+        valid_player = player_index == 0 or player_index == 1
+        integer_location = type(x) is int and type(y) is int
+        if valid_player and integer_location and 0 <= x < self.ARENA_SIZE and 0 <= y < self.ARENA_SIZE and not self.threat_map(player_index)[0][x][y]:
+            return attackers
         """
         Get locations in the range of DESTRUCTOR units
         """
@@ -556,3 +903,47 @@ class GameState:
                 if unit.unit_type == DESTRUCTOR and unit.player_index != player_index:
                     attackers.append(unit)
         return attackers
+
+    def threat_map(self, player_index):
+        """Gets the destructor threat to a unit of the given player for every location on the board
+
+        The map is built in one pass that stamps the range stencil of every enemy destructor,
+        and is cached until an enemy destructor is added or removed.
+
+        Args:
+            player_index: The index corresponding to the defending player, 0 for you 1 for the enemy
+
+        Returns:
+            A tuple (attackers, damage) of ARENA_SIZE x ARENA_SIZE grids indexed [x][y]. attackers holds
+            the number of destructors that would attack a unit at each location, damage holds the damage
+            per frame they would deal. The grids are shared between calls and must not be modified.
+
+        """
+        if not player_index == 0 and not player_index == 1:
+            self._invalid_player_index(player_index)
+            return None
+
+        destructors = self.game_map.get_bitboard(DESTRUCTOR, 1 - player_index)
+        cached = self._threat_maps.get(player_index)
+        if cached is not None and cached[0] == destructors:
+            return cached[1]
+
+        destructor_info = self.config["unitInformation"][UNIT_TYPE_TO_INDEX[DESTRUCTOR]]
+        size = self.ARENA_SIZE
+        stencil = range_stencil(destructor_info["range"])
+        counts = [0] * (size * size)
+        remaining = destructors
+        while remaining:
+            lowest_bit = remaining & -remaining
+            x, y = divmod(lowest_bit.bit_length() - 1, size)
+            for dx, dy in stencil:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    counts[nx * size + ny] += 1
+            remaining ^= lowest_bit
+
+        damage_per_frame = destructor_info["damage"]
+        attackers = tuple(tuple(counts[x * size:(x + 1) * size]) for x in range(size))
+        damage = tuple(tuple(count * damage_per_frame for count in column) for column in attackers)
+        self._threat_maps[player_index] = (destructors, (attackers, damage))
+        return attackers, damage
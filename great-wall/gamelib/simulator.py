@@ -0,0 +1,444 @@
+"""
+The simulator module plays out an action phase locally, as a stand-in for the game engine when comparing candidate attacks.
+It follows the engine's rules closely but not exactly: every unit picks its target before any damage is dealt,
+and encryptor shields do not decay.
+
+simulate_batch plays out many candidate spawns at once. It uses NumPy when it is installed and falls back to
+calling simulate for each candidate otherwise.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .game_map import target_scan_table
+from .unit import GameUnit, unit_stats
+
+class SimulationResult:
+    """The outcome of a simulated action phase
+
+    Attributes :
+        * frames (list): One dict per frame, with "damage" and "breaches" lists indexed by player: the damage
+          that player's units dealt to enemy units and the health damage it scored during the frame
+        * damage_dealt (list): The total damage dealt to enemy units by each player
+        * scored (list): The total health damage scored by each player through breaches
+        * firewalls_destroyed (list): The number of enemy firewalls each player destroyed
+        * self_destructs (list): The number of self destructs by each player's units
+        * frame_count (int): The number of frames simulated
+        * game_state (:obj: GameState): The scratch state as it stands after the last frame, None for batched results
+
+    """
+    def __init__(self, game_state):
+        self.frames = []
+        self.damage_dealt = [0, 0]
+        self.scored = [0, 0]
+        self.firewalls_destroyed = [0, 0]
+        self.self_destructs = [0, 0]
+        self.frame_count = 0
+        self.game_state = game_state
+
+    def __repr__(self):
+        return "SimulationResult({} frames, scored {}, damage dealt {}, firewalls destroyed {})".format(
+            self.frame_count, self.scored, self.damage_dealt, self.firewalls_destroyed)
+
+class _MovingUnit:
+    """An information unit in flight, with the pathing state the engine keeps for it
+    """
+    __slots__ = ("unit", "target_edge", "end_set", "move_interval", "frames_until_move", "steps", "path", "path_index", "path_blocked", "shielded_by")
+
+    def __init__(self, unit, target_edge, end_set):
+        self.unit = unit
+        self.target_edge = target_edge
+        self.end_set = end_set
+        self.move_interval = max(1, int(round(1 / unit.speed))) if unit.speed else 0
+        self.frames_until_move = self.move_interval
+        self.steps = 0
+        self.path = None
+        self.path_index = 0
+        self.path_blocked = None
+        self.shielded_by = set()
+
+def scratch_copy(game_state):
+    """Copies the firewalls of a game state onto a new state the simulator can change freely
+
+    Information units on the map are left out, they are spawned from the deploy stacks instead.
+
+    Args:
+        game_state: The GameState to copy
+
+    Returns:
+        A new GameState with copies of every stationary unit, and the threat maps and path oracles of game_state.
+        It is cloned from game_state, so the serialized string is not parsed again
+
+    """
+    scratch = game_state.clone(stationary_only=True)
+    scratch.suppress_warnings(True)
+    return scratch
+
+def simulate(game_state, deploy_stack=None, enemy_deploy_stack=(), max_frames=1000, build_stack=()):
+    """Simulates the action phase that follows the given state
+
+    Firewalls are taken from game_state's map, including any placed with attempt_spawn this turn.
+    Information units are spawned from the deploy stacks only, so units already queued with attempt_spawn are not counted twice.
+
+    Each frame runs in the engine's order: information units move, encryptors shield, every unit attacks, then destroyed units are removed.
+    A unit that reaches its target edge breaches, a unit whose path ends anywhere else self destructs.
+
+    Args:
+        * game_state: The GameState at the start of the action phase. It is not modified
+        * deploy_stack: (unit_type, x, y) entries for your information units, defaults to the units queued with attempt_spawn this turn
+        * enemy_deploy_stack: (unit_type, x, y) entries for the enemy's information units
+        * max_frames: The frame after which the simulation stops even if units are still alive
+        * build_stack: (unit_type, x, y) entries for extra firewalls of yours to place first, tiles that are taken are skipped
+
+    Returns:
+        A SimulationResult
+
+    """
+    from .game_state import ENCRYPTOR, DESTRUCTOR, PING, EMP, SCRAMBLER
+    if deploy_stack is None:
+        deploy_stack = game_state._deploy_stack
+    config = game_state.config
+    mechanics = config.get("mechanics", {})
+    breach_damage = mechanics.get("basePlayerHealthDamage", 1)
+    steps_to_self_destruct = mechanics.get("stepsRequiredSelfDestruct", 5)
+    self_destruct_radius = mechanics.get("selfDestructRadius", 1.5)
+
+    state = scratch_copy(game_state)
+    game_map = state.game_map
+    size = game_map.ARENA_SIZE
+    result = SimulationResult(state)
+
+    for unit_type, x, y in build_stack:
+        if game_map.in_arena_bounds([x, y]) and not game_map.is_blocked([x, y]):
+            game_map._place_unit(GameUnit(unit_type, config, 0, None, int(x), int(y)))
+
+    movers = []
+    for player_index, stack in ((0, deploy_stack), (1, enemy_deploy_stack)):
+        for unit_type, x, y in stack:
+            unit = GameUnit(unit_type, config, player_index, None, int(x), int(y))
+            game_map._place_unit(unit)
+            target_edge = state.get_target_edge([unit.x, unit.y])
+            end_set = game_map.get_edge_locations(target_edge).index_set
+            movers.append(_MovingUnit(unit, target_edge, end_set))
+
+    firewalls = [unit for unit_list in (game_map[location] for location in game_map.get_arena_locations()) for unit in unit_list if unit.stationary]
+    encryptors = [unit for unit in firewalls if unit.unit_type == ENCRYPTOR]
+    destructors = [unit for unit in firewalls if unit.unit_type == DESTRUCTOR]
+
+    def range_mask(unit):
+        #Bitboard of the tiles in range of a unit, so it only looks for targets when one is there
+        return target_scan_table(unit.range, size)[unit.x * size + unit.y][0]
+
+    def remove(unit):
+        game_map._remove_placed_unit(unit)
+
+    def self_destruct(mover):
+        unit = mover.unit
+        if mover.steps >= steps_to_self_destruct:
+            result.self_destructs[unit.player_index] += 1
+            for location in game_map.get_locations_in_range([unit.x, unit.y], self_destruct_radius):
+                for target in game_map[location]:
+                    if target.stationary and target.player_index != unit.player_index:
+                        target.health -= unit.max_health
+                        damaged.append(target)
+                        frame["damage"][unit.player_index] += unit.max_health
+
+    def step(mover):
+        """Moves a unit one tile along its path. Returns False once the unit has breached or self destructed
+        """
+        unit = mover.unit
+        blocked = game_map.get_blocked_bitboard()
+        if mover.path is None or mover.path_blocked != blocked:
+            #The engine reroutes units when the firewall layout changes
+            mover.path = state.get_path_oracle(mover.target_edge).get_path([unit.x, unit.y])
+            mover.path_index = 0
+            mover.path_blocked = blocked
+        if mover.path is None or mover.path_index + 1 >= len(mover.path):
+            self_destruct(mover)
+            return False
+        mover.path_index += 1
+        next_x, next_y = mover.path[mover.path_index]
+        remove(unit)
+        unit.x, unit.y = next_x, next_y
+        game_map._place_unit(unit)
+        mover.steps += 1
+        if next_x * size + next_y in mover.end_set:
+            result.scored[unit.player_index] += breach_damage
+            frame["breaches"][unit.player_index] += breach_damage
+            if unit.player_index == 0:
+                state.enemy_health -= breach_damage
+            else:
+                state.my_health -= breach_damage
+            return False
+        return True
+
+    mobile_types = [PING, EMP, SCRAMBLER]
+    for frame_number in range(max_frames):
+        if not movers:
+            break
+        frame = {"damage": [0, 0], "breaches": [0, 0]}
+        result.frames.append(frame)
+        damaged = []
+
+        #Move
+        still_moving = []
+        for mover in movers:
+            if mover.move_interval:
+                mover.frames_until_move -= 1
+                if mover.frames_until_move <= 0:
+                    mover.frames_until_move = mover.move_interval
+                    if not step(mover):
+                        remove(mover.unit)
+                        continue
+            still_moving.append(mover)
+        movers = still_moving
+
+        #Shield
+        for encryptor in encryptors:
+            mask = range_mask(encryptor)
+            for mover in movers:
+                unit = mover.unit
+                if unit.player_index == encryptor.player_index and mask >> (unit.x * size + unit.y) & 1 and id(encryptor) not in mover.shielded_by:
+                    mover.shielded_by.add(id(encryptor))
+                    unit.health += encryptor.damage
+
+        #Attack, every unit picks its target before any damage is dealt
+        attacks = []
+        enemy_mobiles = [game_map.get_bitboard(mobile_types, 1), game_map.get_bitboard(mobile_types, 0)]
+        enemy_units = [game_map.get_bitboard(None, 1), game_map.get_bitboard(None, 0)]
+        for destructor in destructors:
+            if range_mask(destructor) & enemy_mobiles[destructor.player_index]:
+                target = state.get_target(destructor)
+                if target is not None and not target.stationary:
+                    attacks.append((destructor, target, destructor.damage))
+        for mover in movers:
+            unit = mover.unit
+            targets = enemy_mobiles if unit.unit_type == SCRAMBLER else enemy_units
+            if not range_mask(unit) & targets[unit.player_index]:
+                continue
+            target = state.get_target(unit)
+            if target is not None:
+                damage = unit.damage_f if target.stationary else unit.damage_i
+                if damage:
+                    attacks.append((unit, target, damage))
+        for attacker, target, damage in attacks:
+            target.health -= damage
+            frame["damage"][attacker.player_index] += damage
+            damaged.append(target)
+
+        #Remove destroyed units
+        removed = set()
+        for unit in damaged:
+            if unit.health <= 0 and id(unit) not in removed:
+                removed.add(id(unit))
+                if unit.stationary:
+                    result.firewalls_destroyed[1 - unit.player_index] += 1
+                remove(unit)
+        if removed:
+            encryptors = [unit for unit in encryptors if unit.health > 0]
+            destructors = [unit for unit in destructors if unit.health > 0]
+            movers = [mover for mover in movers if mover.unit.health > 0]
+
+    result.frame_count = len(result.frames)
+    for frame in result.frames:
+        for player_index in (0, 1):
+            result.damage_dealt[player_index] += frame["damage"][player_index]
+    return result
+
+def simulate_batch(game_state, candidates, max_frames=1000, use_numpy=None):
+    """Simulates one action phase for each candidate spawn of your information units
+
+    With NumPy, every candidate board is advanced together one frame at a time. Each unit keeps the path it had
+    when it was spawned, so destroying a firewall does not reroute it, and the enemy sends no information units.
+    Results therefore match simulate until the first firewall falls. Without NumPy, or with use_numpy=False,
+    each candidate is run through simulate instead.
+
+    Args:
+        * game_state: The GameState at the start of the action phase. It is not modified
+        * candidates: A list of (unit_type, location, count) spawns, one per candidate
+        * max_frames: The frame after which a candidate stops even if units are still alive
+        * use_numpy: True or False to force a mode, None to use NumPy when it is installed
+
+    Returns:
+        A list with a SimulationResult for each candidate. Batched results have no per-frame entries and no game_state
+
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if not use_numpy:
+        return [simulate(game_state, [(unit_type, location[0], location[1])] * count, max_frames=max_frames) for unit_type, location, count in candidates]
+    if np is None:
+        raise ImportError("simulate_batch was asked to use NumPy, but it is not installed")
+    return _simulate_batch_numpy(game_state, candidates, max_frames)
+
+def score_spawns(game_state, locations, unit_types, counts, max_frames=1000, use_numpy=None):
+    """Simulates every combination of spawn location, unit type and count in one batch
+
+    Args:
+        * game_state: The GameState at the start of the action phase
+        * locations: The spawn locations to try
+        * unit_types: The information unit types to try
+        * counts: The unit counts to try
+        * max_frames: The frame after which a candidate stops even if units are still alive
+        * use_numpy: True or False to force a mode, None to use NumPy when it is installed
+
+    Returns:
+        A dict mapping each (x, y, unit_type, count) to its SimulationResult
+
+    """
+    candidates = [(unit_type, location, count) for location in locations for unit_type in unit_types for count in counts]
+    results = simulate_batch(game_state, candidates, max_frames, use_numpy)
+    return {(int(location[0]), int(location[1]), unit_type, count): result for (unit_type, location, count), result in zip(candidates, results)}
+
+def _simulate_batch_numpy(game_state, candidates, max_frames):
+    """The NumPy version of simulate_batch, boards are rows and firewalls are columns of every array
+    """
+    from .game_state import ENCRYPTOR, DESTRUCTOR
+    config = game_state.config
+    mechanics = config.get("mechanics", {})
+    breach_damage = mechanics.get("basePlayerHealthDamage", 1)
+    steps_to_self_destruct = mechanics.get("stepsRequiredSelfDestruct", 5)
+    self_destruct_radius = mechanics.get("selfDestructRadius", 1.5)
+    game_map = game_state.game_map
+    size = game_map.ARENA_SIZE
+    boards = len(candidates)
+    rows = np.arange(boards)
+
+    #Firewalls, ordered like the tiles get_target scans so ties are broken the same way
+    firewalls = []
+    remaining = game_map.get_blocked_bitboard()
+    while remaining:
+        lowest_bit = remaining & -remaining
+        remaining ^= lowest_bit
+        firewalls.extend(unit for unit in game_map[divmod(lowest_bit.bit_length() - 1, size)] if unit.stationary)
+    fw_x = np.array([unit.x for unit in firewalls], dtype=float)
+    fw_y = np.array([unit.y for unit in firewalls], dtype=float)
+    fw_enemy = np.array([unit.player_index == 1 for unit in firewalls], dtype=bool)
+    fw_destructor = fw_enemy & np.array([unit.unit_type == DESTRUCTOR for unit in firewalls], dtype=bool)
+    fw_encryptor = ~fw_enemy & np.array([unit.unit_type == ENCRYPTOR for unit in firewalls], dtype=bool)
+    fw_power = np.array([unit.damage for unit in firewalls], dtype=float)
+    fw_range = np.array([unit.range for unit in firewalls], dtype=float)
+    fw_x_distance = np.abs(game_state.HALF_ARENA - 0.5 - fw_x)
+    fw_hp = np.tile(np.array([unit.health for unit in firewalls], dtype=float), (boards, 1))
+    fw_alive = np.ones((boards, len(firewalls)), dtype=bool)
+
+    #Distance from every tile to every firewall
+    tile_x, tile_y = np.divmod(np.arange(size * size), size)
+    distance = np.sqrt((tile_x[:, None] - fw_x[None, :]) ** 2 + (tile_y[:, None] - fw_y[None, :]) ** 2)
+    fw_reach = distance < fw_range[None, :] + 0.51
+    blast = (distance < self_destruct_radius + 0.51) & fw_enemy[None, :]
+
+    #Candidates, every unit of a candidate follows the path its spawn location has right now
+    oracles = {}
+    paths = []
+    for unit_type, location, count in candidates:
+        target_edge = game_state.get_target_edge(location)
+        if target_edge not in oracles:
+            oracles[target_edge] = (game_state.get_path_oracle(target_edge), game_map.get_edge_locations(target_edge).index_set)
+        oracle, end_set = oracles[target_edge]
+        path = oracle.get_path(location) or [location]
+        paths.append(([int(x) * size + int(y) for x, y in path], _path_ends_in(path, end_set, size)))
+    path_length = np.array([len(path) for path, _ in paths])
+    ends_at_edge = np.array([at_edge for _, at_edge in paths], dtype=bool)
+    path_tiles = np.zeros((boards, path_length.max()), dtype=int)
+    for board, (path, _) in enumerate(paths):
+        path_tiles[board, :len(path)] = path
+        path_tiles[board, len(path):] = path[-1]
+
+    stats = [unit_stats(unit_type, config) for unit_type, _, _ in candidates]
+    move_interval = np.array([max(1, int(round(1 / stat.speed))) if stat.speed else 0 for stat in stats])
+    max_health = np.array([stat.max_health for stat in stats], dtype=float)
+    damage_f = np.array([stat.damage_f for stat in stats], dtype=float)
+    unit_range = np.array([stat.range for stat in stats], dtype=float)
+    counts = np.array([count for _, _, count in candidates])
+    hp = np.where(np.arange(max(counts.max(), 1))[None, :] < counts[:, None], max_health[:, None], 0.0)
+    alive = hp > 0
+    active = alive.any(axis=1)
+    shielded = np.zeros_like(fw_alive)
+    step = np.zeros(boards, dtype=int)
+
+    scored = np.zeros(boards)
+    dealt = np.zeros(boards)
+    taken = np.zeros(boards)
+    destroyed = np.zeros(boards, dtype=int)
+    self_destructs = np.zeros(boards, dtype=int)
+    frame_count = np.zeros(boards, dtype=int)
+
+    for frame_number in range(max_frames):
+        if not active.any():
+            break
+        frame_count += active
+
+        #Move, units at the end of a path that is not on their edge self destruct
+        moving = active & (move_interval > 0) & ((frame_number + 1) % np.maximum(move_interval, 1) == 0)
+        at_end = step >= path_length - 1
+        exploding = moving & at_end
+        if exploding.any():
+            detonating = exploding & (step >= steps_to_self_destruct)
+            living = alive.sum(axis=1)
+            hits = blast[path_tiles[rows, step]] & fw_alive & detonating[:, None]
+            blast_damage = hits * (living * max_health)[:, None]
+            fw_hp -= blast_damage
+            dealt += blast_damage.sum(axis=1)
+            self_destructs += detonating * living
+            alive[exploding] = False
+            active &= ~exploding
+        advancing = moving & ~at_end
+        step += advancing
+        breaching = advancing & ends_at_edge & (step == path_length - 1)
+        if breaching.any():
+            scored += breaching * alive.sum(axis=1) * breach_damage
+            alive[breaching] = False
+            active &= ~breaching
+        position = path_tiles[rows, step]
+
+        #Shield, every encryptor shields each unit once
+        shielding = fw_encryptor & fw_alive & fw_reach[position] & ~shielded & active[:, None]
+        if shielding.any():
+            hp += (shielding * fw_power).sum(axis=1)[:, None] * alive
+            shielded |= shielding
+
+        #Attack, destructors focus the weakest unit of the stack and the stack focuses the get_target firewall
+        incoming = (fw_destructor & fw_alive & fw_reach[position] & active[:, None]) * fw_power
+        incoming = incoming.sum(axis=1)
+        weakest = np.argmin(np.where(alive, hp, np.inf), axis=1)
+        in_range = fw_enemy & fw_alive & (distance[position] < unit_range[:, None] + 0.51) & active[:, None]
+        choice = in_range
+        for key, best in ((distance[position], np.min), (fw_hp, np.min), (np.broadcast_to(fw_y, fw_hp.shape), np.min), (np.broadcast_to(fw_x_distance, fw_hp.shape), np.max)):
+            keyed = np.where(choice, key, np.inf if best is np.min else -np.inf)
+            choice = choice & (keyed == best(keyed, axis=1)[:, None])
+        target = np.argmax(choice, axis=1)
+        outgoing = choice.any(axis=1) * alive.sum(axis=1) * damage_f
+
+        hit = active & (incoming > 0)
+        hp[rows[hit], weakest[hit]] -= incoming[hit]
+        taken += incoming * hit
+        firing = outgoing > 0
+        fw_hp[rows[firing], target[firing]] -= outgoing[firing]
+        dealt += outgoing
+
+        #Remove destroyed units
+        fallen = fw_alive & (fw_hp <= 0)
+        destroyed += fallen.sum(axis=1)
+        fw_alive &= ~fallen
+        alive &= hp > 0
+        active &= alive.any(axis=1)
+
+    results = []
+    for board in range(boards):
+        result = SimulationResult(None)
+        result.scored = [float(scored[board]), 0]
+        result.damage_dealt = [float(dealt[board]), float(taken[board])]
+        result.firewalls_destroyed = [int(destroyed[board]), 0]
+        result.self_destructs = [int(self_destructs[board]), 0]
+        result.frame_count = int(frame_count[board])
+        results.append(result)
+    return results
+
+def _path_ends_in(path, end_set, size):
+    """Returns True if a path ends on one of the flat tile indices in end_set
+    """
+    x, y = path[-1]
+    return len(path) > 1 and int(x) * size + int(y) in end_set
@@ -1,7 +1,16 @@
 import unittest
 import json
+import copy
+import pickle
+import io
+import sys
 from .game_state import GameState
 from .unit import GameUnit
+from .algocore import AlgoCore, sniff_turn_type
+from . import codec
+from .budget import TurnBudget
+from . import simulator
+from . import rollout
 
 class BasicTests(unittest.TestCase):
 
@@ -232,3 +241,456 @@ class BasicTests(unittest.TestCase):
         actual = game.project_future_bits(turns)
         self.assertAlmostEqual(actual, expected, 0, "Expected {} bits {} turns from now, got {}".format(expected, turns, actual))
 
+
+    def test_pathing_reuses_state(self):
+        game = self.make_turn_0_map()
+        path = game.find_path_to_edge([13, 0])
+        self.assertEqual([13, 0], path[0], "Path should start at the unit's location")
+        self.assertIn(path[-1], game.game_map.get_edge_locations(game.game_map.TOP_RIGHT), "Path should end on the target edge")
+        for x in range(0, 28):
+            game.game_map.add_unit("FF", [x, 13], 0)
+        blocked_path = game.find_path_to_edge([13, 0])
+        self.assertEqual([26, 12], blocked_path[-1], "Unit should stop at the most ideal tile below a full wall")
+        game.game_map.remove_unit([13, 13])
+        self.assertIn(game.find_path_to_edge([13, 0])[-1], game.game_map.get_edge_locations(game.game_map.TOP_RIGHT), "Pathfinder state was not reset between queries")
+
+    def test_path_oracle(self):
+        game = self.make_turn_0_map()
+        for location in [[10, 12], [11, 12], [12, 12], [13, 12], [14, 11], [15, 10], [5, 8], [20, 16], [21, 16], [22, 17]]:
+            game.game_map.add_unit("DF", location, 0 if location[1] < 14 else 1)
+        friendly_edges = game.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT) + game.game_map.get_edge_locations(game.game_map.BOTTOM_RIGHT)
+        for target_edge in [game.game_map.TOP_LEFT, game.game_map.TOP_RIGHT]:
+            oracle = game.get_path_oracle(target_edge)
+            for location in friendly_edges:
+                self.assertEqual(game.find_path_to_edge(location, target_edge), oracle.get_path(location), "Oracle path from {} differs".format(location))
+        self.assertEqual(None, game.get_path_oracle(game.game_map.TOP_RIGHT).get_path([13, 12]), "Blocked locations have no path")
+
+    def test_path_cache(self):
+        game = self.make_turn_0_map()
+        pathfinder = game._shortest_path_finder
+        first = game.find_path_to_edge([13, 0])
+        first.append([0, 0])
+        self.assertEqual((0, 1), (pathfinder.cache_hits, pathfinder.cache_misses), "First query should miss the cache")
+        self.assertEqual(first[:-1], game.find_path_to_edge([13, 0]), "Cached paths should not be changed by callers")
+        self.assertEqual((1, 1), (pathfinder.cache_hits, pathfinder.cache_misses), "Repeated query should hit the cache")
+        game.game_map.add_unit("FF", [14, 1])
+        game.find_path_to_edge([13, 0])
+        self.assertEqual(2, pathfinder.cache_misses, "A new firewall layout should miss the cache")
+        game.game_map.remove_unit([14, 1])
+        game.find_path_to_edge([13, 0])
+        self.assertEqual(2, pathfinder.cache_hits, "Restoring the layout should hit the cache again")
+        self.assertEqual(1, pathfinder.blocked[14 * 28 + 1], "A cache hit should not reset the search state")
+
+    def test_incremental_pathing(self):
+        game = self.make_turn_0_map()
+        reference = self.make_turn_0_map()
+        game.set_incremental_pathing(True)
+        oracle = game.get_path_oracle(game.game_map.TOP_RIGHT)
+        for x in range(0, 28):
+            if x != 13:
+                game.game_map.add_unit("FF", [x, 13])
+                reference.game_map.add_unit("FF", [x, 13])
+        self.assertEqual(reference.find_path_to_edge([13, 0]), oracle.get_path([13, 0]), "Oracle was not repaired after placing firewalls")
+        self.assertIn([13, 13], oracle.get_path([13, 0]), "Unit should use the only gap in the wall")
+        game.game_map.add_unit("FF", [13, 13])
+        reference.game_map.add_unit("FF", [13, 13])
+        self.assertEqual(reference.find_path_to_edge([13, 0]), game.find_path_to_edge([13, 0]), "Closing the wall should create a self destruct pocket")
+        game.game_map.remove_unit([5, 13])
+        reference.game_map.remove_unit([5, 13])
+        self.assertEqual(reference.find_path_to_edge([20, 6], game.game_map.TOP_RIGHT), oracle.get_path([20, 6]), "Oracle was not repaired after removing a firewall")
+
+    def test_bitboards(self):
+        game = self.make_turn_0_map()
+        game_map = game.game_map
+        game_map.add_unit("DF", [13, 13], 1)
+        game_map.add_unit("PI", [13, 0], 0)
+        game_map.add_unit("PI", [13, 0], 0)
+        self.assertEqual(1 << (13 * 28 + 13), game_map.get_bitboard("DF", 1), "Destructor bitboard is wrong")
+        self.assertEqual(0, game_map.get_bitboard("DF", 0), "I should not own any destructors")
+        self.assertEqual(1 << 13 * 28, game_map.get_bitboard("PI"), "Pings should share a single bit")
+        self.assertEqual(game_map.get_bitboard(["FF", "EF", "DF"]), game_map.get_blocked_bitboard(), "Only firewalls block tiles")
+        self.assertTrue(game_map.is_blocked([13, 13]), "Destructor should block its tile")
+        self.assertFalse(game_map.is_blocked([13, 0]), "Pings should not block their tile")
+        game_map.add_unit("FF", [13, 13], 0)
+        self.assertEqual(0, game_map.get_bitboard("DF"), "Replaced destructor is still on the bitboard")
+        game_map.remove_unit([13, 13])
+        game_map.remove_unit([13, 0])
+        self.assertEqual(0, game_map.get_bitboard(), "Removed units are still on the bitboard")
+        self.assertEqual(2, bin(game_map.get_area_bitmask([13, 14], [27])).count("1"), "Area mask should hold the two top tiles")
+
+    def test_range_tables(self):
+        game = self.make_turn_0_map()
+        in_range = game.game_map.get_locations_in_range([13, 0], 3)
+        self.assertTrue(all(game.game_map.in_arena_bounds(location) for location in in_range), "Range query returned tiles off the board")
+        self.assertEqual(len(in_range), len([location for location in game.game_map if game.game_map.distance_between_locations(location, [13, 0]) < 3.51]), "Wrong number of tiles in range of an edge tile")
+        in_range.clear()
+        self.assertEqual(37, len(game.game_map.get_locations_in_range([13, 13], 3.0)), "Cached range table was changed by a caller")
+
+    def test_threat_map(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [12, 14], 1)
+        game.game_map.add_unit("DF", [14, 14], 1)
+        game.game_map.add_unit("DF", [13, 12], 0)
+        attackers, damage = game.threat_map(0)
+        for location in game.game_map:
+            self.assertEqual(len(game.get_attackers(location, 0)), attackers[location[0]][location[1]], "Threat map disagrees with get_attackers at {}".format(location))
+        self.assertEqual(2 * game.config["unitInformation"][2]["damage"], damage[13][13], "Wrong damage per frame")
+        self.assertIs(attackers, game.threat_map(0)[0], "Threat map was rebuilt for an unchanged board")
+        game.game_map.remove_unit([12, 14])
+        self.assertEqual(1, game.threat_map(0)[0][13][13], "Threat map was not rebuilt after a destructor was removed")
+        self.assertEqual(1, game.threat_map(1)[0][13][13], "Wrong threat to the enemy")
+
+    def test_unit_shared_stats(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 13], 0)
+        game.game_map.add_unit("DF", [14, 13], 1)
+        game.game_map.add_unit("PI", [13, 0], 0)
+        first, second = game.game_map[13, 13][0], game.game_map[14, 13][0]
+        ping = game.game_map[13, 0][0]
+        self.assertIs(first._stats, second._stats, "Units of one type should share their stats")
+        self.assertIs(game.config, first.config, "Unit lost its config")
+        self.assertEqual((4.0, 3.0, 75.0, 0), (first.damage, first.range, first.max_health, first.speed), "Wrong destructor stats")
+        self.assertTrue(first.stationary and not ping.stationary, "Wrong stationary flags")
+        self.assertFalse(hasattr(ping, "damage"), "Information units have no firewall damage")
+        self.assertFalse(hasattr(first, "damage_f"), "Firewalls have no information damage")
+        with self.assertRaises(AttributeError):
+            first.extra = 1
+        first.health -= 10
+        self.assertEqual(75.0, second.health, "Health should not be shared")
+
+    def test_lazy_units(self):
+        config = self.make_turn_0_map().config
+        turn = """{"p2Units":[[],[],[[13,14,75.0,"3"]],[],[],[],[]],"turnInfo":[0,3,-1],"p1Stats":[30.0,25.0,5.0,0],"p1Units":[[[13,13,60.0,"1"]],[],[],[],[],[],[[13,13,0.0,"2"]]],"p2Stats":[28.0,25.0,5.0,0]}"""
+        lazy = GameState(config, turn, lazy=True)
+        eager = GameState(config, turn)
+        self.assertIsNotNone(lazy._raw_units, "Lazy state placed its units before the map was used")
+        self.assertEqual((3, 28.0), (lazy.turn_number, lazy.enemy_health), "Lazy state should still parse the turn info")
+        self.assertEqual(eager.game_map.get_bitboard(), lazy.game_map.get_bitboard(), "Lazy and eager maps differ")
+        self.assertIsNone(lazy._raw_units, "Units were not placed on first access")
+        self.assertTrue(lazy.game_map[13, 13][0].pending_removal, "Removals should be applied after the units")
+        self.assertEqual(1, len(lazy.get_attackers([13, 13], 0)), "Lazy state lost the enemy destructor")
+
+    def test_action_frame_dispatch(self):
+        self.assertEqual(1, sniff_turn_type('{"p2Units":[],"turnInfo":[1,3,12]}'), "Wrong frame type read from the text")
+        self.assertIsNone(sniff_turn_type('{"turnInfo": [1,3,12]}'), "Unreadable frame types should be left to the json parser")
+
+        class Recorder(AlgoCore):
+            def on_action_frame(self, action_frame):
+                self.frames.append(action_frame)
+
+        lines = ['{"replaySave":1}\n', '{"turnInfo":[1,0,0],"events":{}}\n', '{"turnInfo": [1,0,1],"events":{}}\n', '{"turnInfo":[2,0,0]}\n']
+        recorder = Recorder()
+        recorder.frames = []
+        recorder.parsed_action_frames = True
+        stdin, stderr = sys.stdin, sys.stderr
+        sys.stdin, sys.stderr = io.StringIO("".join(lines)), io.StringIO()
+        try:
+            recorder.start()
+        finally:
+            sys.stdin, sys.stderr = stdin, stderr
+        self.assertEqual([[1, 0, 0], [1, 0, 1]], [frame["turnInfo"] for frame in recorder.frames], "Action frames should be passed on parsed")
+
+    def test_codec_backends(self):
+        state = {"turnInfo": [0, 1, -1], "p1Stats": [30.0, 25.5, 5.0, 0], "units": [["FF", 13, 13]]}
+        current = codec.backend
+        try:
+            for backend in codec.available_backends():
+                self.assertEqual(backend, codec.set_backend(backend), "Installed backend could not be selected")
+                self.assertEqual(state, codec.loads(codec.dumps(state)), "{} changed a state on the way through".format(backend))
+                self.assertIsInstance(codec.dumps(state), str, "{} should dump to str".format(backend))
+        finally:
+            codec.set_backend(current)
+        self.assertIn("json", codec.available_backends(), "The standard library backend is always available")
+
+    def test_background_precompute(self):
+        config = dict(self.make_turn_0_map().config, replaySave=1)
+        state = '{{"p2Units":[[],[],[[13,14,75.0,"3"]],[],[],[],[]],"turnInfo":[{},{},0],"p1Stats":[30.0,25.0,5.0,0],"p1Units":[[],[],[{}],[],[],[],[]],"p2Stats":[30.0,25.0,5.0,0],"events":{{"breach":[]}}}}\n'
+
+        class Speculator(AlgoCore):
+            def on_turn(self, turn_state):
+                game_state = GameState(self.config, turn_state)
+                self.used.append(self.apply_precomputed(game_state))
+                self.threats.append(game_state._threat_maps.get(0))
+
+            def on_action_frame(self, action_frame):
+                pass
+
+        lines = [json.dumps(config) + "\n", state.format(1, 0, ""), state.format(0, 1, ""),
+            state.format(1, 1, ""), state.format(0, 2, '[13,12,75.0,"4"]'), '{"turnInfo":[2,2,0]}\n']
+        speculator = Speculator()
+        speculator.background_precompute = True
+        speculator.used, speculator.threats = [], []
+        stdin, stderr = sys.stdin, sys.stderr
+        sys.stdin, sys.stderr = io.StringIO("".join(lines)), io.StringIO()
+        try:
+            speculator.start()
+        finally:
+            sys.stdin, sys.stderr = stdin, stderr
+        self.assertEqual([True, False], speculator.used, "Only results for the same firewall layout should be used")
+        self.assertIsNotNone(speculator.threats[0], "Precomputed threat map was not handed over")
+        self.assertIsNone(speculator.threats[1], "Results for another layout should be dropped")
+
+    def test_background_precompute_parses_once(self):
+        config = dict(self.make_turn_0_map().config, replaySave=1)
+        frame = '{"p2Units":[[],[],[[13,14,75.0,"3"]],[],[],[],[]],"turnInfo":[1,0,0],"p1Stats":[30.0,25.0,5.0,0],"p1Units":[[],[],[],[],[],[],[]],"p2Stats":[30.0,25.0,5.0,0],"events":{"breach":[]}}\n'
+
+        class Speculator(AlgoCore):
+            def on_action_frame(self, action_frame):
+                self.frames.append(action_frame)
+
+        speculator = Speculator()
+        speculator.background_precompute = True
+        speculator.parsed_action_frames = True
+        speculator.frames = []
+        parsed = []
+        loads = codec.loads
+        def counting_loads(text):
+            if '"turnInfo":[1' in text:
+                parsed.append(text)
+            return loads(text)
+        stdin, stderr = sys.stdin, sys.stderr
+        sys.stdin, sys.stderr = io.StringIO(json.dumps(config) + "\n" + frame + '{"turnInfo":[2,0,0]}\n'), io.StringIO()
+        codec.loads = counting_loads
+        try:
+            speculator.start()
+            speculator._executor.shutdown(wait=True)
+        finally:
+            codec.loads = loads
+            sys.stdin, sys.stderr = stdin, stderr
+        self.assertEqual(1, len(parsed), "An action frame should be parsed once for both on_action_frame and the worker")
+        self.assertEqual(1, len(speculator.frames), "The parsed frame was not passed on")
+        self.assertIsNotNone(speculator._speculative_state, "The worker should build its state from the parsed frame")
+
+    def test_turn_budget(self):
+        now = [10.0]
+        budget = TurnBudget(2.0, margin=0.5, clock=lambda: now[0])
+        self.assertEqual(1.5, budget.remaining(), "Margin should come off the limit")
+        now[0] = 10.5
+        stderr, sys.stderr = sys.stderr, io.StringIO()
+        try:
+            self.assertEqual(0.5, budget.checkpoint("build"), "Wrong phase time")
+        finally:
+            sys.stderr = stderr
+        self.assertEqual([("build", 0.5)], budget.timings, "Checkpoint was not recorded")
+
+        @budget.anytime(reserve=0.25)
+        def search():
+            for step in range(10):
+                now[0] += 0.25
+                yield step
+        self.assertEqual(2, search(), "Anytime search should stop once only the reserve is left")
+        self.assertTrue(TurnBudget(1.0, margin=0.0, clock=lambda: now[0], start=now[0] - 2).expired(), "Budget should have run out")
+        self.assertEqual(70.0, TurnBudget.from_config(self.make_turn_0_map().config).limit, "Limit should come from waitTimeBotSoft")
+        self.assertEqual(5.0, TurnBudget.from_config({}).limit, "Missing limits default to 5 seconds")
+
+    def test_simulator(self):
+        game = self.make_turn_0_map()
+        result = simulator.simulate(game, [("PI", 13, 0), ("PI", 13, 0)])
+        self.assertEqual([2, 0], result.scored, "Pings on an empty board should both breach")
+        self.assertEqual(28.0, result.game_state.enemy_health, "Breaches should cost the enemy health")
+        self.assertEqual(30.0, game.enemy_health, "The simulated state should not be changed")
+        self.assertEqual([], game.game_map[13, 0], "Simulated units should not appear on the real map")
+
+        game.game_map.add_unit("DF", [23, 13], 1)
+        result = simulator.simulate(game, [("PI", 13, 0)])
+        self.assertGreater(result.damage_dealt[1], 0, "The destructor should shoot at the ping")
+        self.assertEqual(sum(frame["damage"][1] for frame in result.frames), result.damage_dealt[1], "Frame damage should add up to the total")
+
+        game = self.make_turn_0_map()
+        for x in range(5, 23):
+            game.game_map.add_unit("FF", [x, 8], 1)
+        result = simulator.simulate(game, [("PI", 13, 0)])
+        self.assertEqual(([0, 0], [1, 0]), (result.scored, result.self_destructs), "A walled in ping should self destruct")
+        self.assertGreaterEqual(result.damage_dealt[0], 15, "The self destruct should damage the wall")
+        self.assertEqual(60.0, game.game_map[13, 8][0].health, "The real wall should not be damaged")
+
+    def test_simulate_batch(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [23, 13], 1)
+        game.game_map.add_unit("DF", [5, 13], 1)
+        game.game_map.add_unit("EF", [14, 3], 0)
+        scores = simulator.score_spawns(game, [[13, 0], [3, 10]], ["PI", "SI"], [1, 2], use_numpy=False)
+        self.assertEqual(8, len(scores), "Every combination should be scored")
+        self.assertEqual(2 * scores[(13, 0, "PI", 1)].damage_dealt[1], scores[(13, 0, "PI", 2)].damage_dealt[1], "The destructor should have to shoot down both pings")
+        if simulator.np is None:
+            return
+        batched = simulator.score_spawns(game, [[13, 0], [3, 10]], ["PI", "SI"], [1, 2], use_numpy=True)
+        for key, result in scores.items():
+            expected = (result.scored, result.damage_dealt, result.self_destructs, result.frame_count)
+            self.assertEqual(expected, (batched[key].scored, batched[key].damage_dealt, batched[key].self_destructs, batched[key].frame_count), "Batched result differs for {}".format(key))
+
+    def test_rollout_pool(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [23, 13], 1)
+        game.game_map.add_unit("EF", [14, 3], 0)
+        candidates = [([], [("PI", 13, 0)]), ([("DF", 12, 4)], [("SI", 3, 10), ("SI", 3, 10)])]
+        expected = [rollout.evaluate_turn(game, build_stack, deploy_stack) for build_stack, deploy_stack in candidates]
+        self.assertFalse(game.contains_stationary_unit([12, 4]), "evaluate_turn should not change the game state")
+        encoded = rollout.encode_state(game)
+        self.assertNotIn(game.serialized_string, encoded, "The turn string should not be sent to the workers")
+        decoded = rollout.decode_state(game.config, encoded)
+        self.assertEqual((game.game_map.get_blocked_bitboard(), game.my_health), (decoded.game_map.get_blocked_bitboard(), decoded.my_health), "Decoded state differs")
+        pool = rollout.RolloutPool(game.config, processes=1)
+        try:
+            results = pool.evaluate(game, candidates)
+            for serial, parallel in zip(expected, results):
+                self.assertEqual((serial.scored, serial.damage_dealt, serial.frame_count), (parallel.scored, parallel.damage_dealt, parallel.frame_count), "Pool results should match serial ones")
+            self.assertEqual([None, None], pool.evaluate(game, candidates, timeout=0), "Nothing should finish without time")
+        finally:
+            pool.close()
+
+    def test_snapshot_restore(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 13], 0)
+        game.game_map.add_unit("PI", [13, 0], 0)
+        game.game_map.add_unit("PI", [13, 0], 0)
+        saved = game.snapshot()
+        clone = game.clone()
+        game.attempt_spawn("EF", [[12, 13]])
+        game.game_map.remove_unit([13, 13])
+        game.game_map[13, 0][0].health = 1
+        self.assertEqual(saved, clone.snapshot(), "Changes to the state reached its clone")
+        game.restore(saved)
+        self.assertEqual(saved, game.snapshot(), "Restore did not undo the changes")
+        self.assertEqual(2, len(game.game_map[13, 0]), "Restore lost the stacked pings")
+        self.assertTrue(game.contains_stationary_unit([13, 13]), "Restore lost the destructor")
+        self.assertEqual(25, game.get_resource(game.CORES), "Restore did not refund the cores")
+
+    def test_transaction_rollback(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("FF", [13, 13], 0)
+        game.game_map.add_unit("PI", [14, 0], 0)
+        saved = game.snapshot()
+        with game.transaction():
+            game.attempt_spawn("DF", [[13, 13], [12, 12]])
+            game.attempt_spawn("PI", [14, 0], 2)
+            mark = game.mark()
+            game.attempt_remove([13, 13])
+            game.game_map.remove_unit([13, 13])
+            game.rollback(mark)
+            self.assertTrue(game.contains_stationary_unit([13, 13]), "Rollback to the inner mark lost the filter")
+            self.assertEqual(3, len(game.game_map[14, 0]), "Rollback to the inner mark undid too much")
+        self.assertEqual(saved, game.snapshot(), "The transaction was not rolled back")
+        self.assertEqual(game.game_map.get_bitboard(), game.game_map.get_bitboard("FF", 0) | game.game_map.get_bitboard("PI", 0), "Bitboards out of sync after rollback")
+
+    def test_bulk_spawn(self):
+        game = self.make_turn_0_map()
+        game.suppress_warnings(True)
+        self.assertEqual(5, game.attempt_spawn("PI", [[13, 0], [14, 0]], 1000), "Only the affordable pings should spawn")
+        self.assertEqual(5, len(game.game_map[13, 0]), "Pings missing from the map")
+        self.assertEqual([("PI", 13, 0)] * 5, game._deploy_stack, "Wrong deploy entries")
+        self.assertEqual(0, game.get_resource(game.BITS), "Bits not spent")
+        self.assertEqual(1, game.attempt_spawn("FF", [13, 1], 3), "A firewall spawns once per location")
+        self.assertTrue(game.can_spawn("FF", (14, 0)), "Tuple locations should be on the edge as well")
+        self.assertFalse(game.can_spawn("PI", [13, 5]), "Pings must spawn on the edge")
+
+    def test_get_target_priority(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("FF", [13, 14], 1)
+        destructor = GameUnit("DF", game.config, 0, None, 13, 12)
+        scrambler = GameUnit("SI", game.config, 0, None, 13, 12)
+        self.assertEqual([13, 14], [game.get_target(destructor).x, game.get_target(destructor).y], "Should attack the firewall in range")
+        self.assertIsNone(game.get_target(scrambler), "Scramblers should not attack firewalls")
+        game.game_map.add_unit("PI", [12, 15], 1)
+        game.game_map.add_unit("PI", [14, 14], 1)
+        game.game_map.add_unit("PI", [12, 14], 1)
+        game.game_map[12, 14][0].health = 1
+        self.assertIs(game.game_map[12, 14][0], game.get_target(destructor), "Should attack the weakest of the nearest information units")
+        game.game_map[12, 14][0].health = 15
+        self.assertIs(game.game_map[12, 14][0], game.get_target(destructor), "Ties should go to the unit nearest the edge")
+
+    def test_arena_locations(self):
+        game_map = self.make_turn_0_map().game_map
+        locations = [location for location in game_map]
+        self.assertEqual(([13, 0], [14, 27], 420), (locations[0], locations[-1], len(locations)), "Wrong iteration order")
+        self.assertEqual(420 * 420, sum(1 for _ in game_map for _ in game_map), "Nested iteration should visit every pair")
+        self.assertEqual(locations, [list(location) for location in game_map.get_arena_locations()], "The table should match iteration")
+        self.assertEqual(210, len(game_map.get_arena_locations(0)), "Wrong half board size")
+        self.assertTrue(all(y < 14 for x, y in game_map.get_arena_locations(0)), "Your half should be the bottom half")
+        quadrant = game_map.get_arena_locations(quadrant_description=game_map.BOTTOM_RIGHT)
+        self.assertEqual(105, len(quadrant), "Wrong quadrant size")
+        self.assertTrue(set(map(tuple, game_map.get_edge_locations(game_map.BOTTOM_RIGHT))) <= set(quadrant), "The quadrant should hold its edge")
+
+    def test_edge_locations(self):
+        game_map = self.make_turn_0_map().game_map
+        other_map = self.make_turn_0_map().game_map
+        edge = game_map.get_edge_locations(game_map.BOTTOM_LEFT)
+        self.assertIs(edge, other_map.get_edges()[game_map.BOTTOM_LEFT], "Edges should be shared between maps")
+        self.assertEqual((13, 0), edge[0], "Wrong first location")
+        self.assertIn([0, 13], edge, "List locations should be found on the edge")
+        self.assertNotIn([13, 1], edge, "Location wrongly on the edge")
+        friendly_edges = edge + game_map.get_edge_locations(game_map.BOTTOM_RIGHT)
+        self.assertIn([27, 13], friendly_edges, "Joined edges should accept list locations")
+        self.assertEqual(28, len(friendly_edges.index_set), "Wrong number of flat indices")
+        self.assertEqual(13 * 28, edge.indices[0], "Wrong flat index")
+        with self.assertRaises(TypeError):
+            edge[0] = (1, 1)
+
+    def test_project_bits_curve(self):
+        game = self.make_turn_0_map()
+        mine, enemy = game.project_bits_curve(20)
+        self.assertEqual([game.project_future_bits(turns) for turns in range(1, 21)], mine[1:], "Curve differs from project_future_bits")
+        self.assertEqual(mine, enemy, "Both players start with the same bits")
+        spent, _ = game.project_bits_curve(2, ([5, 4], None))
+        self.assertEqual(5.0, spent[1], "Spending everything should leave only the income")
+        self.assertEqual(game.project_future_bits(1, current_bits=spent[1] - 4), spent[2], "Spending should come off before the decay")
+        self.assertEqual(0, game.turns_until_bits(5))
+        turns = game.turns_until_bits(15)
+        self.assertTrue(mine[turns] >= 15 > mine[turns - 1], "Wrong earliest turn for 15 bits")
+        self.assertIsNone(game.turns_until_bits(1000, max_turns=10), "1000 bits cannot be reached in 10 turns")
+
+    def test_copy_after_path_oracle(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("FF", [13, 5], 0)
+        game.get_path_oracle(game.game_map.TOP_RIGHT)
+        for copied in (copy.deepcopy(game), pickle.loads(pickle.dumps(game))):
+            self.assertEqual(game.find_path_to_edge([13, 0]), copied.find_path_to_edge([13, 0]), "The copy should path the same way")
+            self.assertIn([0, 13], copied.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT), "Copied edges lost their membership test")
+
+    def test_edge_locations_accept_lists(self):
+        game = self.make_turn_0_map()
+        edge = game.game_map.get_edge_locations(game.game_map.BOTTOM_LEFT)
+        self.assertEqual((13, 0), edge[0], "Edge locations should be (x, y) tuples")
+        self.assertEqual(edge.index((13, 0)), edge.index([13, 0]), "index should accept list locations")
+        self.assertEqual(1, edge.count([13, 0]), "count should accept list locations")
+        self.assertEqual(0, edge.count([13, 5]), "count should not find locations off the edge")
+        self.assertRaises(ValueError, edge.index, [13, 5])
+        combined = [[1, 2]] + edge
+        self.assertIsInstance(combined, list, "Adding an edge to a list should give a list")
+        self.assertEqual([[1, 2]] + list(edge), combined, "Adding an edge to a list should append its locations")
+
+    def test_get_attackers_invalid_player(self):
+        game = self.make_turn_0_map()
+        game.suppress_warnings(True)
+        game.game_map.add_unit("DF", [13, 14], 1)
+        self.assertEqual(1, len(game.get_attackers([13, 13], 2)), "An invalid player index should warn and scan like before")
+
+    def test_get_attackers_float_location(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [13, 14], 1)
+        self.assertEqual(1, len(game.get_attackers([13.0, 13.0], 0)), "A float location should scan like before")
+        self.assertEqual(0, len(game.get_attackers([3.0, 10.0], 0)), "A float location out of range should find no attackers")
+
+    def test_scratch_copy_without_parsing(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [23, 13], 1)
+        game.game_map.add_unit("PI", [13, 0], 0)
+        game.serialized_string = None
+        scratch = simulator.scratch_copy(game)
+        self.assertEqual(game.game_map.get_blocked_bitboard(), scratch.game_map.get_bitboard(), "Only the firewalls should be copied")
+        self.assertIsNot(game.game_map[23, 13][0], scratch.game_map[23, 13][0], "Firewalls should be copies")
+
+    def test_journal_dropped(self):
+        game = self.make_turn_0_map()
+        with game.transaction():
+            inner = game.mark()
+            game.attempt_spawn("FF", [13, 13])
+            game.release(inner)
+            self.assertIsNotNone(game.game_map._GameMap__journal, "The outer transaction still needs the journal")
+        self.assertIsNone(game.game_map._GameMap__journal, "The journal should be dropped after the outermost rollback")
+        self.assertFalse(game.contains_stationary_unit([13, 13]), "The outer rollback should undo released changes")
+        mark = game.mark()
+        game.attempt_spawn("FF", [13, 13])
+        game.release(mark)
+        self.assertIsNone(game.game_map._GameMap__journal, "Releasing the outermost mark should drop the journal")
+        self.assertTrue(game.contains_stationary_unit([13, 13]), "Released changes should be kept")
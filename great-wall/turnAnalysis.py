@@ -0,0 +1,31 @@
+import numpy as np
+from gamelib.game_map import arena_bounds_table
+
+class TurnAnalysis:
+    """Board analysis for one turn, built once with array operations and shared by the strategy methods
+
+    Arrays are indexed [x, y] like game_map.
+
+    Attributes :
+        * onBoard (ndarray): True for every location inside the arena
+        * friendlyMask (ndarray): True for the locations on our half of the board
+        * enemyMask (ndarray): True for the locations on the enemy half of the board
+        * heatmap (ndarray): The number of enemy destructors hitting each enemy location, 0 on our half and -1 off the board
+        * rotatedHeatmap (ndarray): The heatmap turned a quarter counterclockwise like matRot.rotateMatrix, so rows print top to bottom
+
+    """
+    def __init__(self, game_state):
+        size = game_state.ARENA_SIZE
+        self.onBoard = np.frombuffer(arena_bounds_table(size), dtype=np.uint8).reshape(size, size).astype(bool)
+        topHalf = np.arange(size)[np.newaxis, :] >= game_state.HALF_ARENA
+        self.enemyMask = self.onBoard & topHalf
+        self.friendlyMask = self.onBoard & ~topHalf
+
+        attackers = np.array(game_state.threat_map(0)[0], dtype=float)
+        self.heatmap = np.where(self.onBoard, 0.0, -1.0)
+        self.heatmap[self.enemyMask] += attackers[self.enemyMask]
+        self.rotatedHeatmap = np.rot90(self.heatmap)
+
+    def heatmapRows(self):
+        # One line of text per board row for debug_write, '_' marks tiles off the board
+        return [" ".join('_' if item == -1 else str(int(item)) for item in row) for row in self.rotatedHeatmap]
@@ -3,7 +3,6 @@ import random
 import math
 import warnings
 from sys import maxsize
-import json
 
 
 """
@@ -16,12 +15,17 @@ Advanced strategy tips:
 
   - The GameState.map object can be manually manipulated to create hypothetical 
   board states. Though, we recommended making a copy of the map to preserve 
-  the actual current map state.
+  the actual current map state, game_state.clone() or game_state.snapshot()
+  and game_state.restore() do this cheaply.
 """
 
 class AlgoStrategy(gamelib.AlgoCore):
     def __init__(self):
         super().__init__()
+        # on_action_frame receives each frame already parsed
+        self.parsed_action_frames = True
+        # Threat maps and path oracles for the next turn are computed while the action phase plays out
+        self.background_precompute = True
         seed = random.randrange(maxsize)
         random.seed(seed)
         gamelib.debug_write('Random seed: {}'.format(seed))
@@ -56,6 +60,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         game engine.
         """
         game_state = gamelib.GameState(self.config, turn_state)
+        self.apply_precomputed(game_state)
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(game_state.turn_number))
         game_state.suppress_warnings(True)  #Comment or remove this line to enable warnings.
 
@@ -184,26 +189,28 @@ class AlgoStrategy(gamelib.AlgoCore):
         estimate the path's damage risk.
         """
         damages = []
+        # A path oracle answers the path for every spawn location heading to the same edge, so build one per edge
+        path_oracles = {}
+        # The threat map holds the damage per frame enemy destructors deal at every location
+        damage_per_frame = game_state.threat_map(0)[1]
         # Get the damage estimate each path will take
         for location in location_options:
-            path = game_state.find_path_to_edge(location)
+            target_edge = game_state.get_target_edge(location)
+            if target_edge not in path_oracles:
+                path_oracles[target_edge] = game_state.get_path_oracle(target_edge)
+            path = path_oracles[target_edge].get_path(location)
             damage = 0
             for path_location in path:
-                # Get number of enemy destructors that can attack the final location and multiply by destructor damage
-                damage += len(game_state.get_attackers(path_location, 0)) * gamelib.GameUnit(DESTRUCTOR, game_state.config).damage
+                damage += damage_per_frame[path_location[0]][path_location[1]]
             damages.append(damage)
         
         # Now just return the location that takes the least damage
         return location_options[damages.index(min(damages))]
 
     def detect_enemy_unit(self, game_state, unit_type=None, valid_x = None, valid_y = None):
-        total_units = 0
-        for location in game_state.game_map:
-            if game_state.contains_stationary_unit(location):
-                for unit in game_state.game_map[location]:
-                    if unit.player_index == 1 and (unit_type is None or unit.unit_type == unit_type) and (valid_x is None or location[0] in valid_x) and (valid_y is None or location[1] in valid_y):
-                        total_units += 1
-        return total_units
+        # The map keeps a bitboard per player and unit type, so we can count with bit operations instead of walking the map
+        enemy_units = game_state.game_map.get_bitboard(unit_type, 1) & game_state.game_map.get_blocked_bitboard()
+        return bin(enemy_units & game_state.game_map.get_area_bitmask(valid_x, valid_y)).count("1")
         
     def filter_blocked_locations(self, locations, game_state):
         filtered = []
@@ -212,7 +219,7 @@ class AlgoStrategy(gamelib.AlgoCore):
                 filtered.append(location)
         return filtered
 
-    def on_action_frame(self, turn_string):
+    def on_action_frame(self, action_frame):
         """
         This is the action frame of the game. This function could be called 
         hundreds of times per turn and could slow the algo down so avoid putting slow code here.
@@ -220,8 +227,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         Full doc on format of a game frame at: https://docs.c1games.com/json-docs.html
         """
         # Let's record at what position we get scored on
-        state = json.loads(turn_string)
-        events = state["events"]
+        events = action_frame["events"]
         breaches = events["breach"]
         for breach in breaches:
             location = breach[0]
@@ -16,6 +16,15 @@ Investigating it is useful for advanced players interested in getting data from
 The Navigation class in navigation.py contains functions related to pathfinding, which are used by GameState in pathing related functions. 
 Investigating it is useful for advanced player who want to optimize the slow default pathing algorithm we provide. \n 
 
+The TurnBudget class in budget.py tracks the time spent on a turn. AlgoCore creates one for every turn. \n
+
+The simulate function in simulator.py plays out an action phase locally, to compare candidate attacks without the game engine. 
+simulate_batch and score_spawns compare many candidate spawns at once, using NumPy when it is installed. \n
+
+The RolloutPool class in rollout.py simulates candidate turns on several worker processes. \n
+
+codec.py parses and serializes json, using orjson or ujson when one is installed. \n
+
 util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write().
 """
 
@@ -24,6 +33,9 @@ from .util import debug_write
 from .game_state import GameState
 from .unit import GameUnit
 from .game_map import GameMap
+from .budget import TurnBudget
+from .simulator import simulate
+from .rollout import RolloutPool
 
-__all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util"]
+__all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util", "codec", "budget", "simulator", "rollout"]
  
\ No newline at end of file
@@ -1,8 +1,36 @@
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from . import codec
 from .game_state import GameState
+from .budget import TurnBudget
 from .util import get_command, debug_write, BANNER_TEXT, send_command
 
+TURN_INFO_PREFIX = '"turnInfo":['
+
+def sniff_turn_type(game_state_string):
+    """Reads turnInfo[0] straight from the text of a game state, without parsing the rest of it
+
+    Args:
+        game_state_string: A game state as a json string
+
+    Returns:
+        The state type (0 for a turn, 1 for an action frame, 2 for the end of the game),
+        or None if it could not be read
+
+    """
+    start = game_state_string.find(TURN_INFO_PREFIX)
+    if start == -1:
+        return None
+    start += len(TURN_INFO_PREFIX)
+    end = start
+    while end < len(game_state_string) and game_state_string[end].isdigit():
+        end += 1
+    if end == start:
+        return None
+    return int(game_state_string[start:end])
+
 class AlgoCore(object):
     """
     This class handles communication with the game engine. \n
@@ -10,10 +38,28 @@ class AlgoCore(object):
 
     Attributes :
         * config (JSON): json object containing information about the game
+        * turn_budget (:obj: TurnBudget): Tracks the time spent on the current turn, created when each turn starts
+        * parsed_action_frames (bool): If True, on_action_frame is passed the action frame as a parsed dict instead of a string.
+          The dict is shared with the background precompute, so it should not be changed
+        * drop_unhandled_action_frames (bool): If True, action frames are dropped without being parsed when on_action_frame is not overridden
+        * background_precompute (bool): If True, a worker thread runs precompute on the latest action frame while the action phase
+          plays out, and on_turn can pick up the results with apply_precomputed
 
     """
     def __init__(self):
         self.config = None
+        self.turn_budget = None
+        self.parsed_action_frames = False
+        self.drop_unhandled_action_frames = False
+        self.background_precompute = False
+        self._executor = None
+        self._speculation_lock = threading.Lock()
+        self._speculation_cancelled = threading.Event()
+        self._latest_frame = None
+        self._speculation_future = None
+        self._speculative_state = None
+        self._speculative_fingerprint = None
+        self._expected_fingerprint = None
 
     def on_game_start(self, config):
         """
@@ -40,9 +86,106 @@ class AlgoCore(object):
         The action phase is made up of a sequence of distinct frames. 
         Each of these frames is sent to the algo in order. 
         They can be handled in this function. 
+        The frame is a json string, or a dict if parsed_action_frames is set.
         """
         pass
 
+    def precompute(self, game_state):
+        """
+        Runs on the background worker with a GameState built from the latest action frame, when background_precompute is set.
+        By default it fills in the threat maps of both players and a path oracle for every edge,
+        which land in the caches of game_state. \n
+        Override it to precompute more. Check precompute_cancelled() between steps and return early when it is set.
+        """
+        for player_index in (0, 1):
+            if self.precompute_cancelled():
+                return
+            game_state.threat_map(player_index)
+        game_map = game_state.game_map
+        for target_edge in (game_map.TOP_RIGHT, game_map.TOP_LEFT, game_map.BOTTOM_LEFT, game_map.BOTTOM_RIGHT):
+            if self.precompute_cancelled():
+                return
+            game_state.get_path_oracle(target_edge)
+
+    def precompute_cancelled(self):
+        """
+        Returns True if the precompute running now is no longer needed.
+        """
+        return self._speculation_cancelled.is_set()
+
+    def apply_precomputed(self, game_state):
+        """
+        Hands the results of the background precompute to the GameState of this turn. \n
+        If the worker was precomputing the same firewall layout, this waits for it to finish and copies its threat maps
+        and path oracles into game_state. Work for any other layout is cancelled.
+
+        Args:
+            game_state: The GameState built in on_turn
+
+        Returns:
+            True if precomputed results were used, False otherwise
+        """
+        fingerprint = game_state.layout_fingerprint()
+        with self._speculation_lock:
+            self._expected_fingerprint = fingerprint
+            if self._speculative_fingerprint != fingerprint:
+                self._speculation_cancelled.set()
+            future = self._speculation_future
+        if future is not None:
+            future.result()
+        with self._speculation_lock:
+            speculative_state = self._speculative_state
+            matches = self._speculative_fingerprint == fingerprint
+            self._speculative_state = None
+            self._speculative_fingerprint = None
+            self._expected_fingerprint = None
+        if not matches or speculative_state is None:
+            return False
+        game_state.adopt_cached_analysis(speculative_state)
+        return True
+
+    def __speculate(self, frame):
+        """
+        Queues an action frame for the background worker, which only ever works on the latest one.
+        The frame is the json string, or the dict it was already parsed into.
+        """
+        with self._speculation_lock:
+            self._latest_frame = frame
+            self._speculation_cancelled.clear()
+            if self._speculation_future is not None:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+            self._speculation_future = self._executor.submit(self.__speculation_worker)
+
+    def __speculation_worker(self):
+        while True:
+            with self._speculation_lock:
+                frame = self._latest_frame
+                self._latest_frame = None
+                if frame is None:
+                    self._speculation_future = None
+                    return
+            try:
+                game_state = GameState(self.config, frame)
+                game_state.suppress_warnings(True)
+                fingerprint = game_state.layout_fingerprint()
+                with self._speculation_lock:
+                    if fingerprint == self._speculative_fingerprint:
+                        #Frames that do not change the firewalls have nothing new to compute
+                        continue
+                    if self._expected_fingerprint is not None and fingerprint != self._expected_fingerprint:
+                        #The turn has started with another layout
+                        continue
+                    self._speculative_state = game_state
+                    self._speculative_fingerprint = fingerprint
+                    self._speculation_cancelled.clear()
+                self.precompute(game_state)
+            except Exception as error:
+                debug_write("Background precompute failed: {}".format(error))
+                with self._speculation_lock:
+                    self._speculative_state = None
+                    self._speculative_fingerprint = None
 
     def start(self):
         """ 
@@ -52,36 +195,57 @@ class AlgoCore(object):
         The algo continues this loop until it recieves the "End" turn message from the game.
         """
         debug_write(BANNER_TEXT)
+        handles_action_frames = type(self).on_action_frame is not AlgoCore.on_action_frame
 
         while True:
             # Note: Python blocks and hangs on stdin. Can cause issues if connections aren't setup properly and may need to
             # manually kill this Python program.
             game_state_string = get_command()
+            received = time.perf_counter()
             if "replaySave" in game_state_string:
                 """
                 This means this must be the config file. So, load in the config file as a json and add it to your AlgoStrategy class.
                 """
-                parsed_config = json.loads(game_state_string)
+                parsed_config = codec.loads(game_state_string)
                 self.on_game_start(parsed_config)
             elif "turnInfo" in game_state_string:
-                state = json.loads(game_state_string)
-                stateType = int(state.get("turnInfo")[0])
+                #The frame type is read from the text, so frames are only parsed by whoever needs them
+                state = None
+                stateType = sniff_turn_type(game_state_string)
+                if stateType is None:
+                    state = codec.loads(game_state_string)
+                    stateType = int(state.get("turnInfo")[0])
                 if stateType == 0:
                     """
                     This is the game turn game state message. Algo must now print to stdout 2 lines, one for build phase one for
                     deploy phase. Printing is handled by the provided functions.
                     """
+                    self.turn_budget = TurnBudget.from_config(self.config, start=received)
                     self.on_turn(game_state_string)
                 elif stateType == 1:
                     """
                     If stateType == 1, this game_state_string string represents a single frame of an action phase
                     """
-                    self.on_action_frame(game_state_string)
+                    delivered = not (self.drop_unhandled_action_frames and not handles_action_frames)
+                    if state is None and delivered and self.parsed_action_frames:
+                        #Parsed once here and shared with the background worker
+                        state = codec.loads(game_state_string)
+                    if self.background_precompute and self.config is not None:
+                        self.__speculate(state if state is not None else game_state_string)
+                    if not delivered:
+                        continue
+                    if self.parsed_action_frames:
+                        self.on_action_frame(state)
+                    else:
+                        self.on_action_frame(game_state_string)
                 elif stateType == 2:
                     """
                     This is the end game message. This means the game is over so break and finish the program.
                     """
                     debug_write("Got end state, game over. Stopping algo.")
+                    if self._executor is not None:
+                        self._speculation_cancelled.set()
+                        self._executor.shutdown(wait=False)
                     break
                 else:
                     """
@@ -0,0 +1,113 @@
+import functools
+import time
+
+from .util import debug_write
+
+class TurnBudget:
+    """Tracks the wall time spent on one turn, so on_turn can stop computing before the engine's time limit
+
+    AlgoCore creates one at the start of every turn as self.turn_budget. Going over the engine's soft limit
+    (waitTimeBotSoft in the config) costs health, so searches should check remaining() or run through anytime().
+
+    Attributes :
+        * limit (float): The seconds the turn may take before the margin is taken off
+        * margin (float): The seconds kept in reserve for submitting the turn
+        * timings (list): A (label, seconds) pair for every checkpoint, the time spent since the previous one
+
+    """
+    def __init__(self, limit, margin=0.5, start=None, clock=time.perf_counter):
+        """ Starts the budget
+
+        Args:
+            * limit (float): The seconds the turn may take
+            * margin (float): The seconds to keep in reserve
+            * start (float): When the turn started according to clock, defaults to now
+            * clock (function): The clock to measure with, returns seconds
+
+        """
+        self.limit = limit
+        self.margin = margin
+        self.timings = []
+        self._clock = clock
+        self._start = clock() if start is None else start
+        self._last_checkpoint = self._start
+
+    @classmethod
+    def from_config(cls, config, margin=0.5, start=None):
+        """Creates a budget for the soft time limit in the game config
+
+        Args:
+            * config (JSON): A json object containing information about the game
+            * margin (float): The seconds to keep in reserve
+            * start (float): When the turn started according to time.perf_counter, defaults to now
+
+        Returns:
+            A TurnBudget limited to waitTimeBotSoft, or 5 seconds if the config does not set it
+
+        """
+        limit_ms = config.get("timingAndReplay", {}).get("waitTimeBotSoft", 5000) if config else 5000
+        return cls(limit_ms / 1000.0, margin, start)
+
+    def elapsed(self):
+        """Gets the seconds spent on the turn so far
+        """
+        return self._clock() - self._start
+
+    def remaining(self):
+        """Gets the seconds left before the margin is reached, never less than 0
+        """
+        return max(0.0, self.limit - self.margin - self.elapsed())
+
+    def expired(self):
+        """Returns True once there is no time left to spend
+        """
+        return self.remaining() <= 0
+
+    def checkpoint(self, label):
+        """Records and logs the time spent since the previous checkpoint, or since the start of the turn
+
+        Args:
+            label: A name for the phase that just finished
+
+        Returns:
+            The seconds the phase took
+
+        """
+        now = self._clock()
+        duration = now - self._last_checkpoint
+        self._last_checkpoint = now
+        self.timings.append((label, duration))
+        debug_write("{}: {:.1f}ms, {:.1f}ms left".format(label, duration * 1000, self.remaining() * 1000))
+        return duration
+
+    def run_anytime(self, iterations, reserve=0.0):
+        """Runs an anytime search until it finishes or the budget runs out
+
+        Args:
+            * iterations: An iterable, usually a generator, that yields its best result so far after every step
+            * reserve (float): Extra seconds to leave unspent, for the work that follows the search
+
+        Returns:
+            The last result yielded, or None if there was no time for a single step
+
+        """
+        best = None
+        for result in iterations:
+            best = result
+            if self.remaining() <= reserve:
+                break
+        return best
+
+    def anytime(self, reserve=0.0):
+        """Decorator that turns a generator function into a function running it with run_anytime
+
+        Args:
+            reserve (float): Extra seconds to leave unspent, for the work that follows the search
+
+        """
+        def decorator(generator_function):
+            @functools.wraps(generator_function)
+            def wrapper(*args, **kwargs):
+                return self.run_anytime(generator_function(*args, **kwargs), reserve)
+            return wrapper
+        return decorator
@@ -1,7 +1,239 @@
 import math
+import functools
 from .unit import GameUnit
 from .util import debug_write
 
+@functools.lru_cache(maxsize=None)
+def arena_bounds_table(arena_size=28):
+    """Flat in-bounds table for the diamond shaped game board, built once per arena size
+
+    Args:
+        arena_size: The size of the arena
+
+    Returns:
+        A bytes object holding 1 at index x * arena_size + y for every location inside the arena, 0 elsewhere
+
+    """
+    half_arena = arena_size // 2
+    table = bytearray(arena_size * arena_size)
+    for y in range(arena_size):
+        row_size = y + 1 if y < half_arena else arena_size - y
+        startx = half_arena - row_size
+        for x in range(startx, startx + 2 * row_size):
+            table[x * arena_size + y] = 1
+    return bytes(table)
+
+@functools.lru_cache(maxsize=None)
+def neighbor_table(arena_size=28):
+    """Flat table of the in-arena neighbors of every tile, built once per arena size
+
+    Args:
+        arena_size: The size of the arena
+
+    Returns:
+        A tuple indexed by x * arena_size + y. Each in-arena tile maps to a tuple with the flat indices of
+        its in-arena neighbors, ordered up, down, right, left. Tiles outside the arena map to an empty tuple.
+
+    """
+    in_bounds = arena_bounds_table(arena_size)
+    table = []
+    for index in range(arena_size * arena_size):
+        if not in_bounds[index]:
+            table.append(())
+            continue
+        x, y = divmod(index, arena_size)
+        neighbors = []
+        for nx, ny in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+            if 0 <= nx < arena_size and 0 <= ny < arena_size and in_bounds[nx * arena_size + ny]:
+                neighbors.append(nx * arena_size + ny)
+        table.append(tuple(neighbors))
+    return tuple(table)
+
+@functools.lru_cache(maxsize=None)
+def range_stencil(radius):
+    """Offsets of every tile within reach of a unit with the given range, built once per range
+
+    A unit with a given range affects all locations whose centers are within that range + 0.51.
+
+    Args:
+        radius: The range of the unit
+
+    Returns:
+        A tuple of (dx, dy) offsets, ordered by dx and then dy
+
+    """
+    search_radius = math.ceil(radius)
+    offsets = []
+    for dx in range(-search_radius, search_radius + 1):
+        for dy in range(-search_radius, search_radius + 1):
+            if math.sqrt(dx * dx + dy * dy) < radius + 0.51:
+                offsets.append((dx, dy))
+    return tuple(offsets)
+
+@functools.lru_cache(maxsize=None)
+def range_table(radius, arena_size=28):
+    """The range stencil clipped to the arena for every tile, built once per range and arena size
+
+    Args:
+        radius: The range of the unit
+        arena_size: The size of the arena
+
+    Returns:
+        A tuple indexed by x * arena_size + y, holding for each tile a tuple with the flat indices
+        of the in-arena tiles in range of it
+
+    """
+    in_bounds = arena_bounds_table(arena_size)
+    stencil = range_stencil(radius)
+    table = []
+    for index in range(arena_size * arena_size):
+        x, y = divmod(index, arena_size)
+        in_range = []
+        for dx, dy in stencil:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < arena_size and 0 <= ny < arena_size and in_bounds[nx * arena_size + ny]:
+                in_range.append(nx * arena_size + ny)
+        table.append(tuple(in_range))
+    return tuple(table)
+
+@functools.lru_cache(maxsize=None)
+def target_scan_table(radius, arena_size=28):
+    """The tiles in range of every tile, grouped by distance for targeting, built once per range and arena size
+
+    Args:
+        radius: The range of the unit
+        arena_size: The size of the arena
+
+    Returns:
+        A tuple indexed by x * arena_size + y. Each entry is a pair of a bitmask of the tiles in range and a tuple
+        of (bitmask, flat indices) groups, one per distance from nearest to farthest. Within a group the tiles keep
+        the order of range_table, so ties are broken the same way as a scan of get_locations_in_range
+
+    """
+    table = []
+    for index, in_range in enumerate(range_table(radius, arena_size)):
+        x, y = divmod(index, arena_size)
+        groups = {}
+        range_mask = 0
+        for target_index in in_range:
+            tx, ty = divmod(target_index, arena_size)
+            groups.setdefault((tx - x) ** 2 + (ty - y) ** 2, []).append(target_index)
+            range_mask |= 1 << target_index
+        ordered = []
+        for squared_distance in sorted(groups):
+            group_mask = 0
+            for target_index in groups[squared_distance]:
+                group_mask |= 1 << target_index
+            ordered.append((group_mask, tuple(groups[squared_distance])))
+        table.append((range_mask, tuple(ordered)))
+    return tuple(table)
+
+@functools.lru_cache(maxsize=None)
+def arena_locations_table(arena_size=28):
+    """Every in-arena location in row order, and the halves and quarters of the board, built once per arena size
+
+    Args:
+        arena_size: The size of the arena
+
+    Returns:
+        A tuple of the (x, y) tuples of the whole board ordered by y and then x, a pair with the bottom and top halves,
+        and a tuple with the quarters along each edge indexed like get_edges: top right, top left, bottom left, bottom right
+
+    """
+    half_arena = arena_size // 2
+    in_bounds = arena_bounds_table(arena_size)
+    locations = tuple((x, y) for y in range(arena_size) for x in range(arena_size) if in_bounds[x * arena_size + y])
+    halves = (tuple(location for location in locations if location[1] < half_arena),
+        tuple(location for location in locations if location[1] >= half_arena))
+    quadrants = (tuple(location for location in halves[1] if location[0] >= half_arena),
+        tuple(location for location in halves[1] if location[0] < half_arena),
+        tuple(location for location in halves[0] if location[0] < half_arena),
+        tuple(location for location in halves[0] if location[0] >= half_arena))
+    return locations, halves, quadrants
+
+class EdgeLocations(tuple):
+    """The (x, y) locations along one edge, shared by every GameMap and never changed
+
+    The locations are (x, y) tuples. Checking a location with `in`, index and count accept [x, y] lists as well as tuples.
+    Adding two EdgeLocations, like the two edges on one side of the board, gives another one,
+    and adding one to a list gives a list.
+
+    Attributes :
+        * indices (tuple): The flat index x * ARENA_SIZE + y of every location, in the same order
+        * index_set (frozenset): The flat indices as a set
+        * bitmask (int): An int with bit x * ARENA_SIZE + y set for every location
+        * arena_size (int): The size of the arena the flat indices are for
+
+    """
+    def __new__(cls, locations, arena_size):
+        edge = super().__new__(cls, (tuple(map(int, location)) for location in locations))
+        edge.arena_size = arena_size
+        edge.indices = tuple(x * arena_size + y for x, y in edge)
+        edge.index_set = frozenset(edge.indices)
+        edge.bitmask = 0
+        for index in edge.indices:
+            edge.bitmask |= 1 << index
+        edge._location_set = frozenset(edge)
+        return edge
+
+    def __contains__(self, location):
+        try:
+            return tuple(location) in self._location_set
+        except TypeError:
+            return False
+
+    def index(self, location, *args):
+        try:
+            location = tuple(location)
+        except TypeError:
+            pass
+        return super().index(location, *args)
+
+    def count(self, location):
+        return 1 if location in self else 0
+
+    def __add__(self, other):
+        return EdgeLocations(tuple(self) + tuple(other), self.arena_size)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __reduce__(self):
+        #Rebuilt from the locations, so copy, deepcopy and pickle work
+        return (EdgeLocations, (tuple(self), self.arena_size))
+
+@functools.lru_cache(maxsize=None)
+def edge_table(arena_size=28):
+    """The four edges of the board, built once per arena size
+
+    Args:
+        arena_size: The size of the arena
+
+    Returns:
+        A tuple of four EdgeLocations, indexed like get_edges: top right, top left, bottom left, bottom right
+
+    """
+    half_arena = arena_size // 2
+    top_right = [(half_arena + num, arena_size - 1 - num) for num in range(half_arena)]
+    top_left = [(half_arena - 1 - num, arena_size - 1 - num) for num in range(half_arena)]
+    bottom_left = [(half_arena - 1 - num, num) for num in range(half_arena)]
+    bottom_right = [(half_arena + num, num) for num in range(half_arena)]
+    return tuple(EdgeLocations(edge, arena_size) for edge in (top_right, top_left, bottom_left, bottom_right))
+
+@functools.lru_cache(maxsize=None)
+def edge_bitmask_table(arena_size=28):
+    """Bitmasks of the four edges of the board
+
+    Args:
+        arena_size: The size of the arena
+
+    Returns:
+        A tuple of four ints, indexed like get_edges: top right, top left, bottom left, bottom right.
+        Bit x * arena_size + y is set for every location [x, y] on that edge
+
+    """
+    return tuple(edge.bitmask for edge in edge_table(arena_size))
+
 class GameMap:
     """Holds data about the current game map and provides functions
     useful for getting information related to the map.
@@ -9,6 +241,10 @@ class GameMap:
     game_map[x, y] will return a list of Units located at that location, 
     or an empty list if there are no units at the location
 
+    Next to the unit lists the map keeps a bitboard for every player and unit type: a Python int with bit
+    x * ARENA_SIZE + y set when such a unit is at [x, y]. Use get_bitboard and get_blocked_bitboard to answer
+    occupancy questions with bit operations instead of walking unit lists.
+
     Attributes :
         * config (JSON): Contains information about the current game rules
         * enable_warnings (bool): If true, debug messages for game_map functions will print out
@@ -36,7 +272,15 @@ class GameMap:
         self.BOTTOM_LEFT = 2
         self.BOTTOM_RIGHT = 3
         self.__map = self.__empty_grid()
-        self.__start = [13,0]
+        self.__observers = []
+        self.__in_arena = arena_bounds_table(self.ARENA_SIZE)
+        self.__type_index = {}
+        for index, unit_information in enumerate(config["unitInformation"]):
+            self.__type_index[unit_information["shorthand"]] = index
+        self.__bitboards = [[0] * len(self.__type_index) for _ in range(2)]
+        self.__blocked = 0
+        self.__journal = None
+        self.__open_marks = 0
     
     def __getitem__(self, location):
         if len(location) == 2 and self.in_arena_bounds(location):
@@ -46,26 +290,17 @@ class GameMap:
 
     def __setitem__(self, location, val):
         if type(location) == tuple and len(location) == 2 and self.in_arena_bounds(location):
+            if self.__journal is not None:
+                self.__journal.append((location[0], location[1], self.__map[location[0]][location[1]]))
             self.__map[location[0]][location[1]] = val
+            self.__refresh_tile(location[0], location[1])
             return
         self._invalid_coordinates(location)
 
     def __iter__(self):
-        self.__start = [13,0]
-        return self
-    
-    def __next__(self):
-        location = self.__start
-        if location == [15,27]:
-            raise StopIteration
-        new_location = [location[0]+1, location[1]]
-        while not self.in_arena_bounds(new_location) and not location == [14,27]:
-            if new_location[0] == self.ARENA_SIZE:
-                new_location = [0, new_location[1]+1]
-            else:
-                new_location = [new_location[0]+1, new_location[1]]
-        self.__start = new_location
-        return location 
+        #Every loop gets its own generator, so iterating the map inside another loop over it works
+        for x, y in arena_locations_table(self.ARENA_SIZE)[0]:
+            yield [x, y]
 
     def __empty_grid(self):
         grid = []
@@ -103,6 +338,32 @@ class GameMap:
 
         return bottom_half_check or top_half_check
 
+    def get_arena_locations(self, player_index=None, quadrant_description=None):
+        """Gets the in-arena locations, in the same order as iterating over the map
+
+        The locations come from a table built once, so scanning the board this way allocates nothing.
+
+        Args:
+            player_index: 0 for your half of the board, 1 for the enemy half, or None for the whole board
+            quadrant_description: One of the 4 edge constants for the quarter of the board along that edge, used instead of player_index
+
+        Returns:
+            A tuple of (x, y) tuples
+
+        """
+        locations, halves, quadrants = arena_locations_table(self.ARENA_SIZE)
+        if quadrant_description is not None:
+            if not quadrant_description in [self.TOP_LEFT, self.TOP_RIGHT, self.BOTTOM_LEFT, self.BOTTOM_RIGHT]:
+                self.warn("Passed invalid quadrant_description '{}'. See the documentation for valid inputs for get_arena_locations.".format(quadrant_description))
+                return ()
+            return quadrants[quadrant_description]
+        if player_index is None:
+            return locations
+        if player_index == 0 or player_index == 1:
+            return halves[player_index]
+        self.warn("Player index {} is invalid. Player index should be 0 or 1.".format(player_index))
+        return ()
+
     def get_edge_locations(self, quadrant_description):
         """Takes in an edge description and returns a list of locations.
         
@@ -110,44 +371,23 @@ class GameMap:
             quadrant_description: A constant corresponding to one of the 4 edges. See game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, and similar constants.
 
         Returns:
-            A list of locations along the requested edge
+            An EdgeLocations tuple of the (x, y) tuple locations along the requested edge, shared between calls and maps
 
         """
         if not quadrant_description in [self.TOP_LEFT, self.TOP_RIGHT, self.BOTTOM_LEFT, self.BOTTOM_RIGHT]:
             self.warn("Passed invalid quadrant_description '{}'. See the documentation for valid inputs for get_edge_locations.".format(quadrant_description))
             return
 
-        edges = self.get_edges()
-        return edges[quadrant_description]
+        return edge_table(self.ARENA_SIZE)[quadrant_description]
 
     def get_edges(self):
         """Gets all of the edges and their edge locations
 
         Returns:
-            A list with four lists inside of it of locations corresponding to the four edges.
+            A tuple with four EdgeLocations inside of it, of (x, y) tuple locations corresponding to the four edges.
             [0] = top_right, [1] = top_left, [2] = bottom_left, [3] = bottom_right.
         """
-        top_right = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA + num
-            y = self.ARENA_SIZE - 1 - num
-            top_right.append([int(x), int(y)])
-        top_left = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA - 1 - num
-            y = self.ARENA_SIZE - 1 - num
-            top_left.append([int(x), int(y)])
-        bottom_left = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA - 1 - num
-            y = num
-            bottom_left.append([int(x), int(y)])
-        bottom_right = []
-        for num in range(0, self.HALF_ARENA):
-            x = self.HALF_ARENA + num
-            y = num
-            bottom_right.append([int(x), int(y)])
-        return [top_right, top_left, bottom_left, bottom_right]
+        return edge_table(self.ARENA_SIZE)
     
     def add_unit(self, unit_type, location, player_index=0):
         """Add a single GameUnit to the map at the given location.
@@ -169,9 +409,47 @@ class GameMap:
         x, y = location
         new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1])
         if not new_unit.stationary:
+            if self.__journal is not None:
+                self.__journal.append((x, y, len(self.__map[x][y])))
             self.__map[x][y].append(new_unit)
         else:
+            if self.__journal is not None:
+                self.__journal.append((x, y, self.__map[x][y]))
             self.__map[x][y] = [new_unit]
+        self.__refresh_tile(x, y)
+
+    def _add_units(self, unit_type, x, y, player_index, count):
+        """Adds count mobile units of one type to a tile at once, refreshing the tile a single time.
+        Used by GameState.attempt_spawn for large information waves.
+        """
+        tile = self.__map[x][y]
+        if self.__journal is not None:
+            self.__journal.append((x, y, len(tile)))
+        config = self.config
+        tile.extend([GameUnit(unit_type, config, player_index, None, x, y) for _ in range(count)])
+        self.__refresh_tile(x, y)
+
+    def _place_unit(self, unit):
+        """Puts an existing GameUnit on the map at its own location, keeping the bitboards in sync.
+        Used by GameState when parsing the units sent by the game engine.
+        """
+        if self.__journal is not None:
+            self.__journal.append((unit.x, unit.y, len(self.__map[unit.x][unit.y])))
+        self.__map[unit.x][unit.y].append(unit)
+        self.__refresh_tile(unit.x, unit.y)
+
+    def _remove_placed_unit(self, unit):
+        """Takes a single GameUnit off the map, leaving any other units on its tile in place.
+        Used by the simulator when units move or are destroyed.
+        """
+        tile = self.__map[unit.x][unit.y]
+        for index, placed in enumerate(tile):
+            if placed is unit:
+                if self.__journal is not None:
+                    self.__journal.append((unit.x, unit.y, list(tile)))
+                del tile[index]
+                self.__refresh_tile(unit.x, unit.y)
+                return
 
     def remove_unit(self, location):
         """Remove all units on the map in the given location.
@@ -186,7 +464,263 @@ class GameMap:
             self._invalid_coordinates(location)
         
         x, y = location
+        if self.__journal is not None:
+            self.__journal.append((x, y, self.__map[x][y]))
         self.__map[x][y] = []
+        self.__refresh_tile(x, y)
+
+    def snapshot(self, stationary_only=False):
+        """Packs the units on the map into flat tuples, to put them back later with restore
+
+        Only the occupied tiles are visited, using the bitboards, so a snapshot costs about a microsecond per unit.
+
+        Args:
+            stationary_only: If True, only firewalls are packed and information units are left out
+
+        Returns:
+            A tuple of (unit_type, player_index, x, y, health, pending_removal) records followed by
+            the bitboards, for units of both players
+
+        """
+        size = self.ARENA_SIZE
+        grid = self.__map
+        units = []
+        remaining = self.get_blocked_bitboard() if stationary_only else self.get_bitboard()
+        while remaining:
+            lowest_bit = remaining & -remaining
+            remaining ^= lowest_bit
+            x, y = divmod(lowest_bit.bit_length() - 1, size)
+            for unit in grid[x][y]:
+                if stationary_only and not unit.stationary:
+                    continue
+                units.append((unit.unit_type, unit.player_index, x, y, unit.health, unit.pending_removal))
+        if not stationary_only:
+            return (tuple(units), tuple(map(tuple, self.__bitboards)), self.__blocked)
+        #Information units sharing a tile with a firewall are left out, so the bitboards are rebuilt from the records
+        bitboards = [[0] * len(self.__type_index) for _ in range(2)]
+        for unit_type, player_index, x, y, _, _ in units:
+            if player_index == 0 or player_index == 1:
+                bitboards[player_index][self.__type_index[unit_type]] |= 1 << (x * size + y)
+        return (tuple(units), tuple(map(tuple, bitboards)), self.__blocked)
+
+    def restore(self, snapshot):
+        """Replaces the units on the map with the ones packed by snapshot
+
+        The units are new GameUnits, so changes made to them do not reach the map the snapshot was taken from.
+        Observers are told about every tile that became blocked or free.
+
+        Args:
+            snapshot: A tuple returned by snapshot, from this map or another one with the same config
+
+        """
+        units, bitboards, blocked = snapshot
+        size = self.ARENA_SIZE
+        grid = self.__map
+        journal = self.__journal
+        occupied = self.get_bitboard()
+        remaining = occupied
+        while remaining:
+            lowest_bit = remaining & -remaining
+            remaining ^= lowest_bit
+            x, y = divmod(lowest_bit.bit_length() - 1, size)
+            if journal is not None:
+                journal.append((x, y, grid[x][y]))
+            grid[x][y] = []
+        config = self.config
+        for unit_type, player_index, x, y, health, pending_removal in units:
+            if journal is not None and not grid[x][y] and not occupied >> (x * size + y) & 1:
+                journal.append((x, y, 0))
+            unit = GameUnit(unit_type, config, player_index, health, x, y)
+            unit.pending_removal = pending_removal
+            grid[x][y].append(unit)
+        changed = self.__blocked ^ blocked
+        self.__bitboards = [list(player_bitboards) for player_bitboards in bitboards]
+        self.__blocked = blocked
+        if self.__observers:
+            while changed:
+                lowest_bit = changed & -changed
+                changed ^= lowest_bit
+                x, y = divmod(lowest_bit.bit_length() - 1, size)
+                for observer in list(self.__observers):
+                    observer([x, y], bool(blocked & lowest_bit))
+
+    def mark(self):
+        """Starts recording changes to the map, if it is not already, and returns the point to roll back to
+
+        While a mark is open, add_unit, remove_unit, game_map[x, y] = units and restore record what they
+        replace, so rollback can undo them. Changes made to GameUnits or to the lists returned by game_map[x, y]
+        are not recorded. Close every mark with exactly one rollback or release, recording stops and the
+        journal is dropped when the last open mark is closed.
+
+        Returns:
+            An int to pass to rollback or release
+
+        """
+        if self.__journal is None:
+            self.__journal = []
+        self.__open_marks += 1
+        return len(self.__journal)
+
+    def rollback(self, mark):
+        """Undoes every recorded change made since mark was called, newest first
+
+        Args:
+            mark: An int returned by mark. Marks taken after it can no longer be rolled back to
+
+        """
+        journal = self.__journal
+        if journal is None:
+            return
+        grid = self.__map
+        while len(journal) > mark:
+            x, y, previous = journal.pop()
+            if type(previous) is int:
+                del grid[x][y][previous:]
+            else:
+                grid[x][y] = previous
+            self.__refresh_tile(x, y)
+        self.__close_mark()
+
+    def release(self, mark):
+        """Keeps the changes made since mark was called and closes the mark
+
+        An enclosing mark can still roll them back. Releasing the outermost mark drops the journal.
+
+        Args:
+            mark: An int returned by mark
+
+        """
+        self.__close_mark()
+
+    def __close_mark(self):
+        if self.__open_marks > 0:
+            self.__open_marks -= 1
+        if self.__open_marks == 0:
+            self.__journal = None
+
+    def add_observer(self, observer):
+        """Registers a function that is called whenever add_unit, remove_unit or game_map[x, y] = units
+        changes whether a tile is blocked.
+
+        Args:
+            observer: A function taking a location and a bool, True if a stationary unit now blocks that location
+
+        Changes made by editing the list returned by game_map[x, y] in place are not reported.
+        """
+        self.__observers.append(observer)
+
+    def remove_observer(self, observer):
+        """Stops calling an observer registered with add_observer
+
+        Args:
+            observer: The function to stop calling
+        """
+        if observer in self.__observers:
+            self.__observers.remove(observer)
+
+    def __refresh_tile(self, x, y):
+        """Rebuilds the bitboard bits of one tile from its unit list, and tells the observers if it became blocked or free
+        """
+        size = self.ARENA_SIZE
+        if not (0 <= x < size and 0 <= y < size) or not self.__in_arena[x * size + y]:
+            return
+        bit = 1 << (x * size + y)
+        was_blocked = self.__blocked & bit
+        for player_bitboards in self.__bitboards:
+            for type_index, bitboard in enumerate(player_bitboards):
+                if bitboard & bit:
+                    player_bitboards[type_index] = bitboard & ~bit
+        blocked = 0
+        for unit in self.__map[x][y]:
+            if unit.player_index == 0 or unit.player_index == 1:
+                self.__bitboards[unit.player_index][self.__type_index[unit.unit_type]] |= bit
+            if unit.stationary:
+                blocked = bit
+        self.__blocked = (self.__blocked & ~bit) | blocked
+        if self.__observers and bool(was_blocked) != bool(blocked):
+            for observer in list(self.__observers):
+                observer([x, y], bool(blocked))
+
+    def get_bitboard(self, unit_type=None, player_index=None):
+        """Gets the tiles holding units of the given type(s) and player as a bitboard
+
+        Args:
+            unit_type: A unit type, a list of unit types, or None for every type
+            player_index: 0 for you, 1 for the enemy, or None for both players
+
+        Returns:
+            An int with bit x * ARENA_SIZE + y set for every location [x, y] holding a matching unit
+
+        """
+        if unit_type is None:
+            type_indices = range(len(self.__type_index))
+        else:
+            unit_types = [unit_type] if isinstance(unit_type, str) else unit_type
+            type_indices = []
+            for single_type in unit_types:
+                if single_type not in self.__type_index:
+                    self.warn("Invalid unit type '{}' passed to get_bitboard.".format(single_type))
+                    return 0
+                type_indices.append(self.__type_index[single_type])
+        if player_index is None:
+            player_bitboards = self.__bitboards
+        elif player_index == 0 or player_index == 1:
+            player_bitboards = [self.__bitboards[player_index]]
+        else:
+            self.warn("Player index {} is invalid. Player index should be 0 or 1.".format(player_index))
+            return 0
+
+        bitboard = 0
+        for bitboards in player_bitboards:
+            for type_index in type_indices:
+                bitboard |= bitboards[type_index]
+        return bitboard
+
+    def get_blocked_bitboard(self):
+        """Gets every tile holding a stationary unit as a bitboard
+
+        Returns:
+            An int with bit x * ARENA_SIZE + y set for every blocked location [x, y]
+
+        """
+        return self.__blocked
+
+    def is_blocked(self, location):
+        """Checks for a stationary unit at a location with a single bit test
+
+        Args:
+            location: The location to check
+
+        Returns:
+            True if a stationary unit of either player is at the location, False otherwise
+
+        """
+        x, y = map(int, location)
+        size = self.ARENA_SIZE
+        if not (0 <= x < size and 0 <= y < size):
+            return False
+        return bool(self.__blocked >> (x * size + y) & 1)
+
+    def get_area_bitmask(self, valid_x=None, valid_y=None):
+        """Gets a bitmask of the in-arena locations whose coordinates are in the given lists
+
+        Args:
+            valid_x: A list of x coordinates, or None to allow any x
+            valid_y: A list of y coordinates, or None to allow any y
+
+        Returns:
+            An int with bit x * ARENA_SIZE + y set for every matching location, to combine with get_bitboard
+
+        """
+        size = self.ARENA_SIZE
+        xs = range(size) if valid_x is None else valid_x
+        ys = range(size) if valid_y is None else valid_y
+        bitmask = 0
+        for x in xs:
+            for y in ys:
+                if 0 <= x < size and 0 <= y < size and self.__in_arena[x * size + y]:
+                    bitmask |= 1 << (x * size + y)
+        return bitmask
 
     def get_locations_in_range(self, location, radius):
         """Gets locations in a circular area around a location
@@ -205,6 +739,10 @@ class GameMap:
             self._invalid_coordinates(location)
 
         x, y = location
+        size = self.ARENA_SIZE
+        if 0 <= x < size and 0 <= y < size and x == int(x) and y == int(y):
+            return [[index // size, index % size] for index in range_table(radius, size)[int(x) * size + int(y)]]
+
         locations = []
         search_radius = math.ceil(radius)
         for i in range(int(x - search_radius), int(x + search_radius + 1)):
@@ -1,24 +1,9 @@
 import heapq
 import math
 import sys
-import queue
+from collections import deque, OrderedDict
 from .util import debug_write
-
-class Node:
-    """A pathfinding node
-
-    Attributes :
-        * visited_idealness (bool): Have we visited this node during the idealness search step?
-        * visited_validate (bool): Have we visited this node during the validation step?
-        * blocked (bool): Is there a firewall at this node's location
-        * pathlength: The distance between this node and the target location
-
-    """
-    def __init__(self):
-        self.visited_idealness = False
-        self.visited_validate = False
-        self.blocked = False
-        self.pathlength = -1
+from .game_map import arena_bounds_table, neighbor_table
 
 """
 This class helps with pathfinding. We guarantee the results will
@@ -33,24 +18,53 @@ class ShortestPathFinder:
         * VERTICAL (int): A constant representing a vertical movement
 
         * game_state (:obj: GameState): The current gamestate
-        * game_map (:obj: GameMap): The current gamemap
+        * blocked (bytearray): 1 where a firewall blocks the tile, indexed by x * ARENA_SIZE + y
+        * visited_idealness (bytearray): 1 where the idealness search step has visited the tile
+        * pathlength (list): The distance between each tile and the target location, -1 if unvisited
+        * cache_size (int): The number of paths navigate_multiple_endpoints remembers, 0 disables the cache
+        * cache_hits (int): The number of paths served from the cache
+        * cache_misses (int): The number of paths that had to be searched
+        * incremental (bool): Whether paths come from PathOracles kept in sync with the map, see set_incremental
 
     """
-    def __init__(self):
+    def __init__(self, cache_size=256):
         self.HORIZONTAL = 1
         self.VERTICAL = 2
         self.initialized = False
+        self.ARENA_SIZE = 0
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._path_cache = OrderedDict()
+        self.incremental = False
+        self._oracles = {}
+        self._observed_map = None
 
     def initialize_map(self, game_state):
         """Initializes the map
 
+        The flat state arrays are only allocated the first time the pathfinder sees an arena size,
+        later queries reset them in place with a single slice assignment each.
+
         Args:
             game_state: A GameState object representing the gamestate we want to traverse
         """
         #Initialize map 
         self.initialized = True
         self.game_state = game_state
-        self.game_map = [[Node() for x in range(self.game_state.ARENA_SIZE)] for y in range(self.game_state.ARENA_SIZE)]
+        if self.ARENA_SIZE != game_state.ARENA_SIZE:
+            self.ARENA_SIZE = game_state.ARENA_SIZE
+            tiles = self.ARENA_SIZE * self.ARENA_SIZE
+            self._cleared = bytes(tiles)
+            self._unvisited = [-1] * tiles
+            self.blocked = bytearray(tiles)
+            self.visited_idealness = bytearray(tiles)
+            self.pathlength = list(self._unvisited)
+            self._neighbors = neighbor_table(self.ARENA_SIZE)
+            return
+        self.blocked[:] = self._cleared
+        self.visited_idealness[:] = self._cleared
+        self.pathlength[:] = self._unvisited
 
     def navigate_multiple_endpoints(self, start_point, end_points, game_state):
         """Finds the path a unit would take to reach a set of endpoints
@@ -64,57 +78,145 @@ class ShortestPathFinder:
             The path a unit at start_point would take when trying to reach end_points given the current game state.
             Note that this path can change if a tower is destroyed during pathing, or if you or your enemy places firewalls.
 
+        A path only depends on the start, the endpoints and the blocked tiles, so recent results are kept
+        in an LRU cache keyed by those. When a path comes from the cache the search state (see print_map)
+        is not touched and still holds the last search.
+
         """
         if game_state.contains_stationary_unit(start_point):
             return
+        if self.incremental:
+            return self.get_oracle(end_points, game_state).get_path(start_point)
+
+        #Internally every tile is referred to by its flat index x * ARENA_SIZE + y
+        size = game_state.ARENA_SIZE
+        start = int(start_point[0]) * size + int(start_point[1])
+        end_indices = [int(x) * size + int(y) for x, y in end_points]
+
+        #The cache is checked before any search state is set up
+        cache_key = (game_state.game_map.get_blocked_bitboard(), start, tuple(end_indices))
+        cached_path = self._path_cache.get(cache_key)
+        if cached_path is not None:
+            self.cache_hits += 1
+            self._path_cache.move_to_end(cache_key)
+            return [list(location) for location in cached_path]
+        self.cache_misses += 1
 
         #Initialize map 
         self.initialize_map(game_state)
-        #Fill in walls
-        for location in self.game_state.game_map:
-            if self.game_state.contains_stationary_unit(location):
-                self.game_map[location[0]][location[1]].blocked = True
+        self._fill_walls()
         #Do pathfinding
-        ideal_endpoints = self._idealness_search(start_point, end_points)
-        self._validate(ideal_endpoints, end_points)
-        return self._get_path(start_point, end_points)
+        direction = self._get_direction_from_endpoints(end_points)
+        ideal_endpoints = self._idealness_search(start, end_indices, direction)
+        self._validate(ideal_endpoints, end_indices)
+        path = self._get_path(start, direction)
+
+        if self.cache_size > 0:
+            self._path_cache[cache_key] = tuple(tuple(location) for location in path)
+            if len(self._path_cache) > self.cache_size:
+                self._path_cache.popitem(last=False)
+        return path
+
+    def set_incremental(self, game_state, enabled=True):
+        """Turns incremental pathing on or off
+
+        In incremental mode the pathfinder keeps one PathOracle per set of endpoints and registers with
+        game_state.game_map, so that add_unit and remove_unit repair only the part of each oracle affected
+        by the changed tile instead of searching the whole board again. navigate_multiple_endpoints then
+        answers from those oracles. Useful when trying many firewall placements one at a time.
+
+        Args:
+            * game_state: The game state whose map should be followed
+            * enabled: True to turn incremental pathing on, False to turn it off
+
+        """
+        if self._observed_map is not None:
+            self._observed_map.remove_observer(self._on_tile_changed)
+            self._observed_map = None
+        self._oracles = {}
+        self.incremental = enabled
+        if enabled:
+            self._observed_map = game_state.game_map
+            self._observed_map.add_observer(self._on_tile_changed)
+
+    def get_oracle(self, end_points, game_state):
+        """Gets a PathOracle for the given endpoints
+
+        Args:
+            * end_points: The end points of the units, should be a list of edge locations
+            * game_state: The current game state
+
+        Returns:
+            In incremental mode, the oracle kept in sync with the map. Otherwise a new oracle for the current layout.
+
+        """
+        if not self.incremental:
+            return PathOracle(game_state, end_points)
+        key = tuple((int(x), int(y)) for x, y in end_points)
+        oracle = self._oracles.get(key)
+        if oracle is None:
+            oracle = PathOracle(game_state, end_points)
+            self._oracles[key] = oracle
+        return oracle
+
+    def _on_tile_changed(self, location, blocked):
+        for oracle in self._oracles.values():
+            oracle.update_tile(location, blocked)
+
+    def clear_cache(self):
+        """Forgets every cached path and resets the hit and miss counters
+        """
+        self._path_cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _fill_walls(self):
+        """Marks every tile holding a stationary unit as blocked
 
-    def _idealness_search(self, start, end_points):
+        Returns:
+            The blocked tiles as a bitset, bit x * ARENA_SIZE + y is set when that tile is blocked
+        """
+        blocked_bits = self.game_state.game_map.get_blocked_bitboard()
+        remaining = blocked_bits
+        while remaining:
+            lowest_bit = remaining & -remaining
+            self.blocked[lowest_bit.bit_length() - 1] = 1
+            remaining ^= lowest_bit
+        return blocked_bits
+
+    def _idealness_search(self, start, end_points, direction):
         """
         Finds the most ideal tile in our 'pocket' of pathable space. 
         The edge if it is available, or the best self destruct location otherwise
         """
-        current = queue.Queue()
-        current.put(start)
-        best_idealness = self._get_idealness(start, end_points)
-        self.game_map[start[0]][start[1]].visited_idealness = True
+        neighbors = self._neighbors
+        blocked = self.blocked
+        visited = self.visited_idealness
+        end_points = set(end_points)
+
+        current = deque([start])
+        best_idealness = self._get_idealness(start, end_points, direction)
+        visited[start] = 1
         most_ideal = start
 
-        while not current.empty():
-            search_location = current.get()
-            for neighbor in self._get_neighbors(search_location):
-                if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+        while current:
+            search_location = current.popleft()
+            for neighbor in neighbors[search_location]:
+                if blocked[neighbor] or visited[neighbor]:
                     continue
+                visited[neighbor] = 1
+                current.append(neighbor)
 
-                x, y = neighbor
-                current_idealness = self._get_idealness(neighbor, end_points)
-
+                current_idealness = self._get_idealness(neighbor, end_points, direction)
                 if current_idealness > best_idealness:
                     best_idealness = current_idealness
                     most_ideal = neighbor
-
-                if not self.game_map[x][y].visited_idealness and not self.game_map[x][y].blocked:
-                    self.game_map[x][y].visited_idealness = True
-                    current.put(neighbor)
+                    if best_idealness == sys.maxsize:
+                        #Any reachable endpoint means we validate from the whole edge
+                        return most_ideal
 
         return most_ideal
 
-    def _get_neighbors(self, location):
-        """Get the locations adjacent to a location
-        """
-        x, y = location
-        return [[x, y + 1], [x, y - 1], [x + 1, y], [x - 1, y]]
-
     def _get_direction_from_endpoints(self, end_points):
         """Prints a message to the games debug output
 
@@ -134,27 +236,28 @@ class ShortestPathFinder:
             direction[1] = -1
         return direction
 
-    def _get_idealness(self, location, end_points):
+    def _get_idealness(self, index, end_points, direction):
         """Get the idealness of a tile, the reachable tile the unit most wants to path to.
         Better self destruct locations are more ideal. The endpoints are perfectly ideal. 
 
         Returns:
             A location the unit will attempt to reach
         """
-        if location in end_points:
+        if index in end_points:
             return sys.maxsize
 
-        direction = self._get_direction_from_endpoints(end_points)
+        size = self.ARENA_SIZE
+        x, y = divmod(index, size)
 
         idealness = 0
         if direction[1] == 1:
-            idealness += 28 * location[1]
+            idealness += size * y
         else: 
-            idealness += 28 * (27 - location[1])
+            idealness += size * (size - 1 - y)
         if direction[0] == 1:
-            idealness += location[0]
+            idealness += x
         else: 
-            idealness += (27 - location[0])
+            idealness += (size - 1 - x)
 
         return idealness
 
@@ -164,51 +267,50 @@ class ShortestPathFinder:
         """
         #VALDIATION
         #Add our most ideal tiles to current
-        current = queue.Queue()
+        neighbors = self._neighbors
+        blocked = self.blocked
+        pathlength = self.pathlength
+
         if ideal_tile in end_points:
-            for location in end_points:
-               current.put(location)
-               #Set current pathlength to 0
-               self.game_map[location[0]][location[1]].pathlength = 0
-               self.game_map[location[0]][location[1]].visited_validate = True
+            current = deque(end_points)
         else:
-            current.put(ideal_tile)
-            self.game_map[ideal_tile[0]][ideal_tile[1]].pathlength = 0
-            self.game_map[ideal_tile[0]][ideal_tile[1]].visited_validate = True
-
-        #While current is not empty
-        while not current.empty():
-            current_location = current.get()
-            current_node = self.game_map[current_location[0]][current_location[1]]
-            for neighbor in self._get_neighbors(current_location):
-                if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
-                    continue
-
-                neighbor_node = self.game_map[neighbor[0]][neighbor[1]]
-                if not neighbor_node.visited_validate and not current_node.blocked:
-                    neighbor_node.pathlength = current_node.pathlength + 1
-                    neighbor_node.visited_validate = True
-                    current.put(neighbor)
+            current = deque([ideal_tile])
+        for index in current:
+            #Set current pathlength to 0
+            pathlength[index] = 0
+
+        #While current is not empty. A pathlength of -1 marks a tile we have not visited yet
+        while current:
+            current_index = current.popleft()
+            if blocked[current_index]:
+                continue
+            next_pathlength = pathlength[current_index] + 1
+            for neighbor in neighbors[current_index]:
+                if pathlength[neighbor] == -1 and not blocked[neighbor]:
+                    pathlength[neighbor] = next_pathlength
+                    current.append(neighbor)
 
         #debug_write("Print after validate")
         #self.print_map()
         return
 
-    def _get_path(self, start_point, end_points):
+    def _get_path(self, start_point, direction):
         """Once all nodes are validated, and a target is found, the unit can path to its target
 
         """
         #GET THE PATH
+        size = self.ARENA_SIZE
         path = [start_point]
         current = start_point
         move_direction = 0
 
-        while not self.game_map[current[0]][current[1]].pathlength == 0:
-            #debug_write("current tile {} has cost {}".format(current, self.game_map[current[0]][current[1]].pathlength))
-            next_move = self._choose_next_move(current, move_direction, end_points)
+        while not self.pathlength[current] == 0:
+            #debug_write("current tile {} has cost {}".format(divmod(current, size), self.pathlength[current]))
+            next_move = self._choose_next_move(current, move_direction, direction)
             #debug_write(next_move)
 
-            if current[0] == next_move[0]:
+            #Neighbors in the same column differ by one index
+            if abs(current - next_move) == 1:
                 move_direction = self.VERTICAL
             else:
                 move_direction = self.HORIZONTAL
@@ -216,24 +318,25 @@ class ShortestPathFinder:
             current = next_move
         
         #debug_write(path)
-        return path
+        return [list(divmod(index, size)) for index in path]
   
-    def _choose_next_move(self, current_point, previous_move_direction, end_points):
+    def _choose_next_move(self, current_point, previous_move_direction, direction):
         """Given the current location and adjacent locations, return the best 'next step' for a given unit to take
         """
-        neighbors = self._get_neighbors(current_point)
+        neighbors = self._neighbors[current_point]
         #debug_write("Unit at {} previously moved {} and has these neighbors {}".format(current_point, previous_move_direction, neighbors))
 
+        blocked = self.blocked
+        pathlength = self.pathlength
         ideal_neighbor = current_point
-        best_pathlength = self.game_map[current_point[0]][current_point[1]].pathlength
+        best_pathlength = pathlength[current_point]
         for neighbor in neighbors:
             #debug_write("Comparing champ {} and contender {}".format(ideal_neighbor, neighbor))
-            if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+            if blocked[neighbor]:
                 continue
 
             new_best = False
-            x, y = neighbor
-            current_pathlength = self.game_map[x][y].pathlength
+            current_pathlength = pathlength[neighbor]
 
             #Filter by pathlength
             if current_pathlength > best_pathlength:
@@ -243,7 +346,7 @@ class ShortestPathFinder:
                 new_best = True
 
             #Filter by direction based on prev move
-            if not new_best and not self._better_direction(current_point, neighbor, ideal_neighbor, previous_move_direction, end_points):
+            if not new_best and not self._better_direction(current_point, neighbor, ideal_neighbor, previous_move_direction, direction):
                 continue
 
             ideal_neighbor = neighbor
@@ -252,10 +355,14 @@ class ShortestPathFinder:
         #debug_write("Gave unit at {} new tile {}".format(current_point, ideal_neighbor))
         return ideal_neighbor
 
-    def _better_direction(self, prev_tile, new_tile, prev_best, previous_move_direction, end_points):
+    def _better_direction(self, prev_tile, new_tile, prev_best, previous_move_direction, direction):
         """Compare two tiles and return True if the unit would rather move to the new one
 
         """
+        size = self.ARENA_SIZE
+        prev_tile = divmod(prev_tile, size)
+        new_tile = divmod(new_tile, size)
+        prev_best = divmod(prev_best, size)
         #True if we are moving in a different direction than prev move and prev is not
         #If we previously moved horizontal, and now one of our options has a different x position then the other (the two options are not up/down)
         if previous_move_direction == self.HORIZONTAL and not new_tile[0] == prev_best[0]:
@@ -274,7 +381,6 @@ class ShortestPathFinder:
             return True
         
         #To make it here, both moves are on the same axis 
-        direction = self._get_direction_from_endpoints(end_points)
         if new_tile[1] == prev_best[1]: #If they both moved horizontal...
             if direction[0] == 1 and new_tile[0] > prev_best[0]: #If we moved right and right is our direction, we moved towards our direction
                 return True 
@@ -297,11 +403,12 @@ class ShortestPathFinder:
             debug_write("Attempted to print_map before pathfinder initialization. Use 'this_object.initialize_map(game_state)' to initialize the map first")
             return
 
-        for y in range(28):
-            for x in range(28):
-                node = self.game_map[x][28 - y - 1]
-                if not node.blocked and not node.pathlength == -1:
-                    self._print_justified(node.pathlength)
+        size = self.ARENA_SIZE
+        for y in range(size):
+            for x in range(size):
+                index = x * size + (size - y - 1)
+                if not self.blocked[index] and not self.pathlength[index] == -1:
+                    self._print_justified(self.pathlength[index])
                 else:
                     sys.stderr.write("   ")
             debug_write("")
@@ -314,3 +421,218 @@ class ShortestPathFinder:
             sys.stderr.write(" ")
         sys.stderr.write(str(number))
         sys.stderr.write(" ")
+
+
+class PathOracle(ShortestPathFinder):
+    """Answers pathing queries towards one set of endpoints for a firewall layout
+
+    Building the oracle costs about as much as a single navigate_multiple_endpoints call.
+    The pathlength of every pocket of pathable space is filled in up front: pockets that touch
+    the endpoints are validated from the whole edge in one multi-source search, every other pocket
+    from its own most ideal self destruct tile. Afterwards get_path answers any start location
+    in time proportional to the length of its path.
+
+    The oracle does not watch the map by itself. Call update_tile after a tile becomes blocked or free,
+    or let ShortestPathFinder.set_incremental do it for you. The update only repairs the part of the
+    pathlength field that depends on that tile.
+
+    Attributes :
+        * end_points (list): The locations the oracle paths towards
+        * direction (list): The direction [x,y] of the endpoints, see _get_direction_from_endpoints
+
+    """
+    def __init__(self, game_state, end_points):
+        """Fills in the pathlength of every reachable tile
+
+        Args:
+            * game_state: The current game state
+            * end_points: The end points of the units, should be a list of edge locations
+
+        """
+        super().__init__(cache_size=0)
+        self.initialize_map(game_state)
+        self._fill_walls()
+        size = self.ARENA_SIZE
+        self.end_points = end_points
+        self.direction = self._get_direction_from_endpoints(end_points)
+        self._end_indices = [int(x) * size + int(y) for x, y in end_points]
+        self._end_set = set(self._end_indices)
+        #The most ideal tile of the pocket each tile belongs to, -1 for pockets that reach the endpoints
+        self._pocket_ideal = [-1] * (size * size)
+        self._validate(self._end_indices[0], self._end_indices)
+
+        in_arena = arena_bounds_table(size)
+        for index in range(size * size):
+            if in_arena[index] and self.pathlength[index] == -1 and not self.blocked[index]:
+                self._refill_pocket(self._collect_pocket(index))
+
+    def get_path(self, start_location):
+        """Gets the path a unit at a given location would take towards the oracle's endpoints
+
+        Args:
+            start_location: The location of a hypothetical unit
+
+        Returns:
+            A list of locations corresponding to the path the unit would take, the same path
+            navigate_multiple_endpoints would return. None if the start location is blocked or off the board.
+
+        """
+        x, y = map(int, start_location)
+        size = self.ARENA_SIZE
+        if not (0 <= x < size and 0 <= y < size) or not arena_bounds_table(size)[x * size + y] or self.blocked[x * size + y]:
+            return
+        return self._get_path(x * size + y, self.direction)
+
+    def update_tile(self, location, blocked):
+        """Repairs the pathlength field after a single tile became blocked or free
+
+        Args:
+            * location: The location that changed
+            * blocked: True if a stationary unit now blocks the location, False if it was removed
+
+        """
+        size = self.ARENA_SIZE
+        x, y = map(int, location)
+        if not (0 <= x < size and 0 <= y < size) or not arena_bounds_table(size)[x * size + y]:
+            return
+        index = x * size + y
+        if bool(self.blocked[index]) == bool(blocked):
+            return
+        if blocked:
+            self._block_tile(index)
+        else:
+            self._free_tile(index)
+
+    def _block_tile(self, index):
+        """A firewall was placed. Tiles whose every shortest route ran through it are searched again
+        from the unaffected tiles around them, and pockets cut off from the endpoints are refilled.
+        """
+        neighbors = self._neighbors
+        blocked = self.blocked
+        pathlength = self.pathlength
+        pocket_ideal = self._pocket_ideal
+
+        old_pathlength = pathlength[index]
+        old_pocket = pocket_ideal[index]
+        blocked[index] = 1
+        pathlength[index] = -1
+        pocket_ideal[index] = -1
+
+        if old_pocket != -1:
+            #A pocket without endpoints may have been split, refill each part
+            for neighbor in neighbors[index]:
+                if not blocked[neighbor] and pocket_ideal[neighbor] == old_pocket:
+                    self._refill_pocket(self._collect_pocket(neighbor))
+            return
+
+        #Find the tiles that lost every neighbor one step closer to the endpoints, in order of pathlength
+        affected = {index: old_pathlength}
+        current = deque([index])
+        while current:
+            parent = current.popleft()
+            child_pathlength = affected[parent] + 1
+            for child in neighbors[parent]:
+                if blocked[child] or child in affected or pathlength[child] != child_pathlength:
+                    continue
+                supported = False
+                for support in neighbors[child]:
+                    if not blocked[support] and support not in affected and pathlength[support] == child_pathlength - 1:
+                        supported = True
+                        break
+                if not supported:
+                    affected[child] = child_pathlength
+                    pathlength[child] = -1
+                    current.append(child)
+        del affected[index]
+
+        #Search the affected tiles again, starting from the unaffected tiles bordering them
+        frontier = []
+        for tile in affected:
+            best = -1
+            for neighbor in neighbors[tile]:
+                if not blocked[neighbor] and neighbor not in affected and pathlength[neighbor] != -1:
+                    if best == -1 or pathlength[neighbor] + 1 < best:
+                        best = pathlength[neighbor] + 1
+            if best != -1:
+                frontier.append((best, tile))
+        heapq.heapify(frontier)
+        while frontier:
+            tile_pathlength, tile = heapq.heappop(frontier)
+            if pathlength[tile] != -1:
+                continue
+            pathlength[tile] = tile_pathlength
+            for neighbor in neighbors[tile]:
+                if neighbor in affected and pathlength[neighbor] == -1:
+                    heapq.heappush(frontier, (tile_pathlength + 1, neighbor))
+
+        #Whatever is left can no longer reach the endpoints
+        for tile in affected:
+            if pathlength[tile] == -1:
+                self._refill_pocket(self._collect_pocket(tile))
+
+    def _free_tile(self, index):
+        """A firewall was removed. The pockets around it merge, and the pathlengths that can now
+        improve by going through the freed tile are lowered by a search starting from it.
+        """
+        neighbors = self._neighbors
+        blocked = self.blocked
+        pathlength = self.pathlength
+        pocket_ideal = self._pocket_ideal
+
+        reaches_endpoints = index in self._end_set
+        best = -1
+        for neighbor in neighbors[index]:
+            if not blocked[neighbor] and pocket_ideal[neighbor] == -1:
+                reaches_endpoints = True
+                if best == -1 or pathlength[neighbor] + 1 < best:
+                    best = pathlength[neighbor] + 1
+        if not reaches_endpoints:
+            blocked[index] = 0
+            self._refill_pocket(self._collect_pocket(index))
+            return
+
+        #Pockets that could not reach the endpoints before now reach them through this tile
+        for neighbor in neighbors[index]:
+            if not blocked[neighbor] and pocket_ideal[neighbor] != -1:
+                for tile in self._collect_pocket(neighbor):
+                    pathlength[tile] = -1
+                    pocket_ideal[tile] = -1
+
+        blocked[index] = 0
+        pathlength[index] = 0 if index in self._end_set else best
+        current = deque([index])
+        while current:
+            tile = current.popleft()
+            next_pathlength = pathlength[tile] + 1
+            for neighbor in neighbors[tile]:
+                if blocked[neighbor]:
+                    continue
+                if pathlength[neighbor] == -1 or pathlength[neighbor] > next_pathlength:
+                    pathlength[neighbor] = next_pathlength
+                    current.append(neighbor)
+
+    def _collect_pocket(self, start):
+        """Gets every unblocked tile connected to start
+        """
+        neighbors = self._neighbors
+        blocked = self.blocked
+        pocket = [start]
+        seen = {start}
+        for tile in pocket:
+            for neighbor in neighbors[tile]:
+                if not blocked[neighbor] and neighbor not in seen:
+                    seen.add(neighbor)
+                    pocket.append(neighbor)
+        return pocket
+
+    def _refill_pocket(self, pocket):
+        """Validates a pocket that cannot reach the endpoints from its most ideal tile
+        """
+        pathlength = self.pathlength
+        pocket_ideal = self._pocket_ideal
+        ideal_tile = max(pocket, key=lambda tile: self._get_idealness(tile, self._end_set, self.direction))
+        for tile in pocket:
+            pathlength[tile] = -1
+        self._validate(ideal_tile, self._end_indices)
+        for tile in pocket:
+            pocket_ideal[tile] = ideal_tile
@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import time
+
+from . import codec
+from .game_state import GameState
+from .simulator import simulate
+
+#The game config of a worker process and the state it restores every chunk into, set once when the pool starts
+_worker_config = None
+_worker_state = None
+
+def encode_state(game_state):
+    """Packs a game state into a small picklable tuple for the worker processes
+
+    Information units and queued spawns are left out, candidate turns bring their own.
+
+    Args:
+        game_state: The GameState to pack
+
+    Returns:
+        A snapshot tuple, see GameState.snapshot, holding the resources, health, turn number and
+        an (unit_type, player_index, x, y, health, pending_removal) record for every firewall on the map,
+        including firewalls placed this turn
+
+    """
+    snapshot = game_state.snapshot(stationary_only=True)
+    return snapshot[:5] + ((), ())
+
+def _empty_state(config):
+    """
+    A state with no units to restore encoded states into, so the worker never parses a turn string.
+    """
+    empty_units = [[] for _ in config["unitInformation"]]
+    turn = {"turnInfo": [0, 0, -1], "p1Stats": [0, 0, 0, 0], "p2Stats": [0, 0, 0, 0], "p1Units": empty_units, "p2Units": empty_units}
+    game_state = GameState(config, codec.dumps(turn))
+    game_state.suppress_warnings(True)
+    return game_state
+
+def decode_state(config, encoded_state):
+    """Rebuilds a game state packed by encode_state
+
+    Args:
+        * config: A json object containing information about the game
+        * encoded_state: The tuple returned by encode_state
+
+    Returns:
+        A new GameState with the packed firewalls on its map
+
+    """
+    game_state = _empty_state(config)
+    game_state.restore(encoded_state)
+    return game_state
+
+def _init_worker(config):
+    global _worker_config, _worker_state
+    _worker_config = config
+    _worker_state = _empty_state(config)
+
+def _evaluate_chunk(task):
+    """Simulates a chunk of candidate turns in a worker process, skipping the ones that start after the deadline
+    """
+    encoded_state, chunk, deadline = task
+    #Threat maps and path oracles cached by earlier chunks are kept, they are looked up by layout
+    game_state = _worker_state
+    game_state.restore(encoded_state)
+    results = []
+    for index, (build_stack, deploy_stack) in chunk:
+        if deadline is not None and time.time() > deadline:
+            results.append((index, None))
+            continue
+        results.append((index, evaluate_turn(game_state, build_stack, deploy_stack)))
+    return results
+
+def evaluate_turn(game_state, build_stack, deploy_stack):
+    """Simulates one candidate turn: places its firewalls, then plays out the action phase with its information units
+
+    Args:
+        * game_state: The GameState to start from. It is not modified
+        * build_stack: (unit_type, x, y) entries for the firewalls to place
+        * deploy_stack: (unit_type, x, y) entries for the information units to send
+
+    Returns:
+        A SimulationResult without per-frame entries or game_state, so it is cheap to send between processes
+
+    """
+    result = simulate(game_state, deploy_stack, build_stack=build_stack)
+    result.frames = []
+    result.game_state = None
+    return result
+
+class RolloutPool:
+    """A persistent pool of worker processes that simulate candidate turns in parallel
+
+    Start it once, in on_game_start, so the cost of starting processes is paid before the first turn.
+    Each evaluate call sends a compact copy of the state to the workers with every chunk of candidates.
+
+    Attributes :
+        * processes (int): The number of worker processes
+
+    """
+    def __init__(self, config, processes=None):
+        """ Starts the worker processes
+
+        Args:
+            * config: A json object containing information about the game
+            * processes: The number of workers, defaults to the number of CPUs
+
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(config,))
+
+    def evaluate(self, game_state, candidates, timeout=None):
+        """Simulates candidate turns on the workers
+
+        Args:
+            * game_state: The GameState to start every candidate from
+            * candidates: A list of (build_stack, deploy_stack) pairs, each a list of (unit_type, x, y) entries
+            * timeout: Seconds to wait for results, or None to wait for all of them
+
+        Returns:
+            A list with the SimulationResult of each candidate, in order. Candidates that were not finished
+            before the timeout are None
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        encoded_state = encode_state(game_state)
+        indexed = list(enumerate((list(build_stack), list(deploy_stack)) for build_stack, deploy_stack in candidates))
+        #Several chunks per worker, so a slow chunk does not hold up the others
+        chunk_size = max(1, len(indexed) // (self.processes * 4))
+        tasks = [(encoded_state, indexed[start:start + chunk_size], deadline) for start in range(0, len(indexed), chunk_size)]
+
+        results = [None] * len(indexed)
+        pending = self._pool.imap_unordered(_evaluate_chunk, tasks)
+        for _ in tasks:
+            try:
+                if deadline is None:
+                    chunk_results = pending.next()
+                else:
+                    chunk_results = pending.next(max(0.0, deadline - time.time()))
+            except multiprocessing.TimeoutError:
+                break
+            for index, result in chunk_results:
+                results[index] = result
+        return results
+
+    def close(self):
+        """Stops the worker processes
+        """
+        self._pool.terminate()
+        self._pool.join()
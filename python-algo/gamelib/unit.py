@@ -8,6 +8,57 @@ def is_stationary(unit_type, firewall_types):
     """
     return unit_type in firewall_types
 
+_unit_stats_tables = {}
+
+class _UnitStats:
+    """The stats shared by every unit of one type, read from one config
+
+    Fields that do not apply to the type (damage for information units, damage_f and damage_i
+    for firewalls) are left unset, so reading them raises AttributeError.
+
+    """
+    __slots__ = ("config", "stationary", "speed", "damage", "damage_f", "damage_i", "range", "max_health", "cost")
+
+    def __init__(self, unit_type, config):
+        from .game_state import FIREWALL_TYPES, UNIT_TYPE_TO_INDEX, ENCRYPTOR
+        self.config = config
+        self.stationary = is_stationary(unit_type, FIREWALL_TYPES)
+        type_config = config["unitInformation"][UNIT_TYPE_TO_INDEX[unit_type]]
+        if self.stationary:
+            self.speed = 0
+            if unit_type == ENCRYPTOR:
+                self.damage = type_config["shieldAmount"]
+            else:
+                self.damage = type_config["damage"]
+        else:
+            self.speed = type_config["speed"]
+            self.damage_f = type_config["damageF"]
+            self.damage_i = type_config["damageI"]
+        self.range = type_config["range"]
+        self.max_health = type_config["stability"]
+        self.cost = type_config["cost"]
+
+def unit_stats(unit_type, config):
+    """Gets the shared stats of a unit type, building them the first time a type is seen for a config
+
+    Args:
+        unit_type: A unit type
+        config: A json object containing information about the game
+
+    Returns:
+        The stats shared by every unit of the given type
+
+    """
+    #Tables are keyed by id, and hold on to their config so the id cannot be reused
+    table = _unit_stats_tables.get(id(config))
+    if table is None or table[0] is not config:
+        table = (config, {})
+        _unit_stats_tables[id(config)] = table
+    stats = table[1].get(unit_type)
+    if stats is None:
+        stats = table[1][unit_type] = _UnitStats(unit_type, config)
+    return stats
+
 class GameUnit:
     """Holds information about a Unit. 
 
@@ -28,36 +79,56 @@ class GameUnit:
         * cost (int): The resource cost of this unit
 
     """
+    __slots__ = ("unit_type", "player_index", "pending_removal", "x", "y", "health", "_stats")
+
     def __init__(self, unit_type, config, player_index=None, health=None, x=-1, y=-1):
         """ Initialize unit variables using args passed
 
         """
         self.unit_type = unit_type
-        self.config = config
+        self._stats = unit_stats(unit_type, config)
         self.player_index = player_index
         self.pending_removal = False
         self.x = x
         self.y = y
-        self.__serialize_type()
-        self.health = self.max_health if not health else health
+        self.health = self._stats.max_health if not health else health
 
-    def __serialize_type(self):
-        from .game_state import FIREWALL_TYPES, UNIT_TYPE_TO_INDEX, ENCRYPTOR
-        self.stationary = is_stationary(self.unit_type, FIREWALL_TYPES)
-        type_config = self.config["unitInformation"][UNIT_TYPE_TO_INDEX[self.unit_type]]
-        if self.stationary:
-            self.speed = 0
-            if self.unit_type == ENCRYPTOR:
-                self.damage = type_config["shieldAmount"]
-            else:
-                self.damage = type_config["damage"]
-        else:
-            self.speed = type_config["speed"]
-            self.damage_f = type_config["damageF"]
-            self.damage_i = type_config["damageI"]
-        self.range = type_config["range"]
-        self.max_health = type_config["stability"]
-        self.cost = type_config["cost"]
+    #Stats are the same for every unit of a type, so they are read from the shared table
+    @property
+    def config(self):
+        return self._stats.config
+
+    @property
+    def stationary(self):
+        return self._stats.stationary
+
+    @property
+    def speed(self):
+        return self._stats.speed
+
+    @property
+    def damage(self):
+        return self._stats.damage
+
+    @property
+    def damage_f(self):
+        return self._stats.damage_f
+
+    @property
+    def damage_i(self):
+        return self._stats.damage_i
+
+    @property
+    def range(self):
+        return self._stats.range
+
+    @property
+    def max_health(self):
+        return self._stats.max_health
+
+    @property
+    def cost(self):
+        return self._stats.cost
 
     def __toString(self):
         owner = "Friendly" if self.player_index == 0 else "Enemy"
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+# Measures how long gamelib takes to parse the states in a replay with each installed json backend
+# Usage: python scripts/benchmark_parse.py [replay file] [repeats]
+
+file_dir = os.path.dirname(os.path.realpath(__file__))
+parent_dir = os.path.abspath(os.path.join(file_dir, os.pardir))
+sys.path.insert(0, os.path.join(parent_dir, "python-algo"))
+
+import gamelib
+from gamelib import codec
+
+replay_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(file_dir, "test_replay.replay")
+repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+with open(replay_path) as replay:
+    lines = [line for line in replay if line.strip()]
+
+config_line = next(line for line in lines if "replaySave" in line)
+turn_lines = [line for line in lines if gamelib.algocore.sniff_turn_type(line) == 0]
+frame_lines = [line for line in lines if gamelib.algocore.sniff_turn_type(line) == 1]
+print("Replay: {} ({} turns, {} action frames)".format(replay_path, len(turn_lines), len(frame_lines)))
+
+def best_time(function):
+    # Best of several runs, to keep noise from other processes out of the numbers
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def parse_turns():
+    for line in turn_lines:
+        gamelib.GameState(config, line)
+
+def parse_frames():
+    for line in frame_lines:
+        codec.loads(line)
+
+def dump_turns():
+    for _ in turn_lines:
+        codec.dumps(deploy_stack)
+
+deploy_stack = [["FF", x, 13] for x in range(28)]
+for name in codec.available_backends():
+    codec.set_backend(name)
+    config = codec.loads(config_line)
+    turn_time = best_time(parse_turns)
+    frame_time = best_time(parse_frames)
+    dump_time = best_time(dump_turns)
+    print("{:>7}: {:8.3f} ms per turn state, {:7.1f} us per action frame, {:6.1f} us per turn submission".format(
+        name, 1000 * turn_time / len(turn_lines), 1e6 * frame_time / len(frame_lines), 1e6 * dump_time / len(turn_lines)))